@@ -1,17 +1,51 @@
-from dataclasses import dataclass
-from datetime import timedelta
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import partial
 import logging
-
-from aiohttp import ClientTimeout
+import math
+from pathlib import Path
+from typing import TypeVar
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE, CONF_NAME, Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, TimestampDataUpdateCoordinator
 
-from .api import QWeatherClient
-from .const import CONF_API_HOST, CONF_GRID
+from .api import MINUTELY_INTERVAL, QWeatherClient, QWeatherJwt, QWeatherWarningList
+from .cassette import Cassette
+from .const import (
+    CASSETTE_FILE,
+    CONF_API_HOST,
+    CONF_BULK_WARNING,
+    CONF_CASSETTE,
+    CONF_CASSETTE_TIME_SCALE,
+    CONF_DAILY_DAYS,
+    CONF_GRID,
+    CONF_HEDGE,
+    CONF_HISTORY,
+    CONF_INDICES,
+    CONF_JWT_KEY_ID,
+    CONF_JWT_PRIVATE_KEY,
+    CONF_JWT_PROJECT_ID,
+    CONF_LOCATION_ID,
+    CONF_REFRESH_WAVES,
+    CONF_TRACKED_ENTITY,
+    DEFAULT_INDICES,
+    DOMAIN,
+    STORAGE_VERSION,
+    WARNING_LIST_RANGE,
+    MinutelyPrecipitation,
+)
+from .services import async_setup_services
+from .session import RequestTimings, create_session
+from .tracker import LocationTracker
+from .waves import RefreshWaves
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,30 +55,156 @@ PLATFORMS = [
     Platform.WEATHER,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 type QWeatherConfigEntry = ConfigEntry[Coordinators]
 
+_DataT = TypeVar("_DataT")
 
-async def async_setup_entry(hass: HomeAssistant, entry: QWeatherConfigEntry) -> bool:
-    entry.async_on_unload(entry.add_update_listener(entry_update_listener))
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: QWeatherConfigEntry) -> bool:
     api_host: str = entry.data[CONF_API_HOST]
-    api_key: str = entry.data[CONF_API_KEY]
+    api_key: str | None = entry.data.get(CONF_API_KEY)
+    jwt_auth = (
+        QWeatherJwt(entry.data[CONF_JWT_PROJECT_ID], entry.data[CONF_JWT_KEY_ID], entry.data[CONF_JWT_PRIVATE_KEY])
+        if entry.data.get(CONF_JWT_PRIVATE_KEY)
+        else None
+    )
     longitude: str = str(round(entry.data[CONF_LONGITUDE], 2))
     latitude: str = str(round(entry.data[CONF_LATITUDE], 2))
     grid_weather: bool = entry.options.get(CONF_GRID, True)
+    indices: list[str] = entry.options.get(CONF_INDICES, DEFAULT_INDICES)
+    hedge: bool = entry.options.get(CONF_HEDGE, False)
+    daily_days: int = entry.options.get(CONF_DAILY_DAYS, 7)
+    warning_list = async_get_warning_list(hass, entry) if entry.options.get(CONF_BULK_WARNING, False) else None
+    cassette = await async_load_cassette(
+        hass, entry.options.get(CONF_CASSETTE, "off"), entry.options.get(CONF_CASSETTE_TIME_SCALE, 1.0)
+    )
+    backoff_store = get_backoff_store(hass, entry)
+    wait_until = await async_load_backoff(backoff_store)
+
+    timings = RequestTimings()
+    session = create_session(timings)
+    entry.async_on_unload(session.close)
+    entry.async_on_unload(lambda: _LOGGER.debug("[%s] Request timings: %s", entry.unique_id, timings))
+    client = QWeatherClient(
+        session,
+        api_host,
+        api_key,
+        longitude,
+        latitude,
+        grid_weather,
+        indices=indices,
+        jwt_auth=jwt_auth,
+        hedge=hedge,
+        cassette=cassette,
+        daily_days=daily_days,
+        warning_list=warning_list,
+        location_id=entry.data.get(CONF_LOCATION_ID),
+        wait_until=wait_until,
+        on_backoff=lambda until: async_save_backoff(backoff_store, until),
+    )
+    entry.async_on_unload(client.cancel_probes)
+    entry.runtime_data = coordinators = Coordinators(hass, entry, client)
 
-    session = async_create_clientsession(hass, timeout=ClientTimeout(total=20))
-    client = QWeatherClient(session, api_host, api_key, longitude, latitude, grid_weather)
-    entry.runtime_data = coordinators = Coordinators(hass, client)
+    if tracked_entity := entry.options.get(CONF_TRACKED_ENTITY):
+        entry.async_on_unload(LocationTracker(hass, coordinators, tracked_entity).async_start())
 
-    for coordinator in coordinators.__dict__.values():
+    for coordinator in coordinators:
         await coordinator.async_config_entry_first_refresh()
 
+    # 旧版本创建的条目没有保存 LocationID，首次查询到后写回条目；在注册更新监听之前写入，避免触发重载
+    if (
+        not entry.data.get(CONF_LOCATION_ID)
+        and client.location_id
+        and client.params["location"] == f"{longitude},{latitude}"
+    ):
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_LOCATION_ID: client.location_id})
+    entry.async_on_unload(entry.add_update_listener(entry_update_listener))
+
+    if entry.options.get(CONF_REFRESH_WAVES, False):
+        entry.async_on_unload(RefreshWaves(hass, coordinators).async_start())
+
+    if entry.options.get(CONF_HISTORY, False) and "recorder" in hass.config.components:
+        # 长期统计的接口依赖较新的 HA 版本，只在启用时导入，旧版本上不影响其他功能
+        try:
+            from .history import BACKFILL_INTERVAL, HistoryBackfill  # noqa: PLC0415
+        except ImportError:
+            _LOGGER.warning("History statistics are not supported by this Home Assistant version")
+        else:
+            backfill = HistoryBackfill(hass, client, entry.data[CONF_NAME])
+            entry.async_create_background_task(hass, backfill.async_backfill(), f"{DOMAIN} history backfill")
+            entry.async_on_unload(async_track_time_interval(hass, backfill.async_backfill, BACKFILL_INTERVAL))
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
 
+@callback
+def async_get_warning_list(hass: HomeAssistant, entry: QWeatherConfigEntry) -> QWeatherWarningList:
+    """同一区域的所有条目共享预警城市列表，最后一个条目卸载时移除"""
+    warning_lists: dict[str, QWeatherWarningList] = hass.data.setdefault(DOMAIN, {})
+    if WARNING_LIST_RANGE not in warning_lists:
+        warning_lists[WARNING_LIST_RANGE] = QWeatherWarningList(WARNING_LIST_RANGE)
+    warning_list = warning_lists[WARNING_LIST_RANGE]
+    warning_list.subscribers += 1
+
+    @callback
+    def async_release() -> None:
+        warning_list.subscribers -= 1
+        if not warning_list.subscribers:
+            del warning_lists[WARNING_LIST_RANGE]
+            if not warning_lists:
+                hass.data.pop(DOMAIN)
+
+    entry.async_on_unload(async_release)
+    return warning_list
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: QWeatherConfigEntry) -> None:
+    await get_backoff_store(hass, entry).async_remove()
+
+
+def get_backoff_store(hass: HomeAssistant, entry: QWeatherConfigEntry) -> Store[dict[str, float]]:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.backoff")
+
+
+async def async_load_backoff(store: Store[dict[str, float]]) -> float:
+    """恢复重启前的退避状态（如 402 超出访问次数），避免重载后立即再次请求"""
+    data = await store.async_load()
+    wait_until = data.get("wait_until", 0) if data else 0
+    if wait_until > datetime.now().timestamp():
+        _LOGGER.warning("QWeather API is backing off until %s", datetime.fromtimestamp(wait_until))
+        return wait_until
+    return 0
+
+
+@callback
+def async_save_backoff(store: Store[dict[str, float]], wait_until: float) -> None:
+    # 认证失败等永久错误不保存：用户修正配置后重载即可恢复请求
+    if math.isfinite(wait_until):
+        store.async_delay_save(lambda: {"wait_until": wait_until}, 1)
+
+
+async def async_load_cassette(hass: HomeAssistant, mode: str, time_scale: float = 1.0) -> Cassette | None:
+    path = Path(hass.config.path(CASSETTE_FILE))
+    if mode == "record":
+        _LOGGER.warning("Recording QWeather requests to %s", path)
+        return Cassette(path, "record")
+    if mode == "replay":
+        try:
+            return await hass.async_add_executor_job(Cassette.load, path, time_scale)
+        except FileNotFoundError as err:
+            raise ConfigEntryError(f"Cassette not found: {path}") from err
+    return None
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: QWeatherConfigEntry) -> bool:
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
@@ -63,19 +223,23 @@ class Coordinators:
     air_now: DataUpdateCoordinator
     minutely_precipitation: DataUpdateCoordinator
     warning_now: DataUpdateCoordinator
-    # indices_1d: DataUpdateCoordinator
+    indices_1d: DataUpdateCoordinator
+    client: QWeatherClient = field(repr=False)
 
-    def __init__(self, hass: HomeAssistant, client: QWeatherClient):
+    def __init__(self, hass: HomeAssistant, config_entry: QWeatherConfigEntry | None, client: QWeatherClient):
+        self.client = client
         self.observation = TimestampDataUpdateCoordinator(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name="实时天气",
-            update_method=client.update_observation,
+            update_method=partial(self._async_update_precipitation_source, client.update_observation),
             update_interval=timedelta(minutes=10),
         )
         self.daily_forecast = TimestampDataUpdateCoordinator(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name="每日天气预报",
             update_method=client.update_daily_forecast,
             update_interval=timedelta(hours=1),
@@ -83,13 +247,15 @@ class Coordinators:
         self.hourly_forecast = TimestampDataUpdateCoordinator(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name="逐小时天气预报",
-            update_method=client.update_hourly_forecast,
+            update_method=partial(self._async_update_precipitation_source, client.update_hourly_forecast),
             update_interval=timedelta(minutes=30),
         )
         self.air_now = DataUpdateCoordinator(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name="实时空气质量",
             update_method=client.update_air_now,
             update_interval=timedelta(minutes=30),
@@ -97,21 +263,47 @@ class Coordinators:
         self.minutely_precipitation = DataUpdateCoordinator(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name="分钟级降水",
-            update_method=client.update_minutely_precipitation,
-            update_interval=timedelta(minutes=10),
+            update_method=self._async_update_minutely_precipitation,
+            update_interval=MINUTELY_INTERVAL,
         )
         self.warning_now = DataUpdateCoordinator(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name="天气灾害预警",
             update_method=client.update_warning_now,
             update_interval=timedelta(minutes=20),
         )
-        # indices_1d=DataUpdateCoordinator(
-        #     hass,
-        #     _LOGGER,
-        #     name="天气指数预报",
-        #     update_method=client.update_indices_1d,
-        #     update_interval=timedelta(hours=12),
-        # )
+        self.indices_1d = DataUpdateCoordinator(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name="天气指数预报",
+            update_method=client.update_indices_1d,
+            update_interval=timedelta(hours=6),
+        )
+
+    async def _async_update_minutely_precipitation(self) -> MinutelyPrecipitation:
+        # 协调器在更新完成后按 update_interval 安排下一次刷新，因此在返回前调整
+        data = await self.client.update_minutely_precipitation()
+        self.minutely_precipitation.update_interval = self.client.minutely_interval()
+        return data
+
+    async def _async_update_precipitation_source(self, update_method: Callable[[], Awaitable[_DataT]]) -> _DataT:
+        """实况或逐小时预报出现降水时立即刷新分钟级降水，不必等待放宽后的间隔
+
+        在更新方法中检查而不注册监听，逐小时预报仍然只在天气实体有订阅时轮询。
+        """
+        data = await update_method()
+        if self.minutely_precipitation.data is not None:
+            interval = self.client.minutely_interval()
+            if interval < self.minutely_precipitation.update_interval:
+                self.minutely_precipitation.update_interval = interval
+                self.minutely_precipitation.hass.async_create_task(self.minutely_precipitation.async_request_refresh())
+        return data
+
+    def __iter__(self) -> Iterator[DataUpdateCoordinator]:
+        """依次返回所有协调器"""
+        return (value for value in self.__dict__.values() if isinstance(value, DataUpdateCoordinator))
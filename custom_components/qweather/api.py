@@ -1,14 +1,25 @@
-from collections.abc import Mapping
-from datetime import datetime, timedelta
+import asyncio
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Callable, Iterable, Mapping
+from datetime import date, datetime, timedelta
 from http import HTTPStatus
 import logging
 import math
+import sys
+import time
 
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientResponse, ClientSession
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+import jwt
 
+import homeassistant.util.dt as dt_util
+
+from .cassette import Cassette, CassetteMiss, CassetteResponse
 from .const import (
     AirQualityNow,
     DailyForecast,
+    HistoricalHourlyWeather,
     HourlyForecast,
     IndicesDailyItem,
     MinutelyPrecipitation,
@@ -18,43 +29,321 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# 对冲请求：慢于该接口近期 p95 耗时的请求会再发一次，取先成功的结果
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.5
+HEDGE_BUDGET = 0.05
+
+# 每日预报分两档：近 3 天随每次轮询更新，远期预报变化慢，每 6 小时更新一次
+DAILY_SHORT_RANGE = 3
+DAILY_LONG_RANGE_INTERVAL = timedelta(hours=6)
+# 远期预报要在客户端缓存 6 小时，只保留天气实体转换预报时用到的字段
+DAILY_CACHED_FIELDS = (
+    "fxDate",
+    "tempMax",
+    "tempMin",
+    "iconDay",
+    "iconNight",
+    "wind360Day",
+    "windSpeedDay",
+    "wind360Night",
+    "windSpeedNight",
+    "humidity",
+    "precip",
+    "pressure",
+    "cloud",
+    "uvIndex",
+)
+
+WARNING_LIST_INTERVAL = timedelta(minutes=15)
+
+# 按坐标查询 LocationID 失败后的重试间隔，期间城市天气仍按坐标请求
+LOCATION_ID_RETRY_INTERVAL = timedelta(hours=1)
+
+# 多个 API Host：按延迟的指数加权平均选择最快的 Host，出错的 Host 暂停使用并定期探测
+HOST_LATENCY_WEIGHT = 0.2
+HOST_PROBE_INTERVAL = timedelta(minutes=5)
+# 服务端错误切换到其他 Host 重试；鉴权、配额等错误与 Host 无关，不切换
+FAILOVER_STATUSES = frozenset(
+    {
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+
+# 分钟级降水按降水风险调整轮询间隔：未来几小时无降水风险时放宽，正在或即将降水时加密。
+# 分钟级降水本身覆盖未来 2 小时，放宽后的间隔不超过它；逐小时预报只在有订阅时轮询，
+# 取到时作为补充，超过 PRECIP_AHEAD_MAX_AGE 不再使用
+MINUTELY_INTERVAL = timedelta(minutes=10)
+MINUTELY_DRY_INTERVAL = timedelta(hours=1)
+MINUTELY_WET_INTERVAL = timedelta(minutes=5)
+PRECIP_LOOKAHEAD_HOURS = 3
+PRECIP_POP_THRESHOLD = 30
+PRECIP_AHEAD_MAX_AGE = timedelta(hours=1)
+
+# 跟随移动设备时保留最近访问过的格点的缓存，往返于常去地点时无需重新请求
+VISITED_CELLS = 8
+
+
+class QWeatherJwt:
+    """https://dev.qweather.com/docs/configuration/authentication/#json-web-token
+
+    签名后的 token 在有效期内复用，临近过期时才重新签名。
+    """
+
+    ttl: int = 900
+    refresh_margin: int = 60
+
+    def __init__(self, project_id: str, key_id: str, private_key: str) -> None:
+        key = load_pem_private_key(private_key.encode(), password=None)
+        if not isinstance(key, Ed25519PrivateKey):
+            raise TypeError("QWeather JWT requires an Ed25519 private key")
+        self.project_id = project_id
+        self.key_id = key_id
+        self._private_key = key
+        self._token = ""
+        self._expires_at: float = 0
+
+    @property
+    def token(self) -> str:
+        now = time.time()
+        if now >= self._expires_at - self.refresh_margin:
+            self._token = self.sign(int(now))
+        return self._token
+
+    def sign(self, now: int) -> str:
+        # iat 提前 30 秒，避免服务器时钟偏差导致 token 尚未生效
+        issued_at = now - 30
+        self._expires_at = issued_at + self.ttl
+        return jwt.encode(
+            {"sub": self.project_id, "iat": issued_at, "exp": self._expires_at},
+            self._private_key,
+            algorithm="EdDSA",
+            headers={"kid": self.key_id},
+        )
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class QWeatherWarningList:
+    """预警-预警城市列表
+
+    同一区域内的所有位置共用一次 warning/list 请求，只有列表中存在预警的 LocationID
+    才请求 warning/now，结果按 LocationID 缓存后分发给各个位置。只有一个位置时
+    列表请求不会比直接查询更省，此时不使用列表。
+    """
+
+    def __init__(self, warning_range: str) -> None:
+        self.warning_range = warning_range
+        self.subscribers = 0
+        self._location_ids: frozenset[str] | None = None
+        self._warnings: dict[str, list[WeatherWarning]] = {}
+        self._until: float = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return self.subscribers > 1
+
+    async def warnings(self, client: "QWeatherClient", location_id: str) -> list[WeatherWarning] | None:
+        """返回 None 表示预警城市列表不可用，由调用方单独查询"""
+        async with self._lock:
+            now = datetime.now().timestamp()
+            if now >= self._until:
+                json_data = await client.api_get_v7("warning/list", {"range": self.warning_range})
+                if not json_data:
+                    return None
+                self._location_ids = frozenset(loc["locationId"] for loc in json_data.get("warningLocList", []))
+                self._warnings = {}
+                self._until = now + WARNING_LIST_INTERVAL.total_seconds()
+            if self._location_ids is None or location_id not in self._location_ids:
+                return []
+            if location_id not in self._warnings:
+                json_data = await client.api_get_v7("warning/now", {"location": location_id})
+                if not json_data:
+                    return None
+                self._warnings[location_id] = json_data.get("warning", [])
+            return self._warnings[location_id]
+
+
+class QWeatherHosts:
+    """多个 API Host 的延迟与错误统计
+
+    可用的 Host 按延迟从快到慢排在前面，出错的 Host 排在最后；出错的 Host 每隔
+    HOST_PROBE_INTERVAL 探测一次，成功后恢复使用。
+    """
+
+    def __init__(self, hosts: Iterable[str]) -> None:
+        self.hosts = list(dict.fromkeys(hosts))
+        # 还没有测得延迟的 Host 排在测得的之后，彼此之间保持配置的顺序，主 Host 始终先于未使用过的备用 Host
+        self._latency = dict.fromkeys(self.hosts, math.inf)
+        self._errors = dict.fromkeys(self.hosts, 0)
+        self._probe_at = dict.fromkeys(self.hosts, 0.0)
+
+    def ordered(self) -> list[str]:
+        healthy = sorted((host for host in self.hosts if not self._errors[host]), key=self._latency.__getitem__)
+        degraded = sorted((host for host in self.hosts if self._errors[host]), key=self._errors.__getitem__)
+        return healthy + degraded
+
+    def due_for_probe(self) -> list[str]:
+        """到了探测时间的出错 Host；排在首位的 Host 本次请求就会尝试，不另外探测"""
+        now = time.monotonic()
+        due = [host for host in self.ordered()[1:] if self._errors[host] and now >= self._probe_at[host]]
+        for host in due:
+            self._probe_at[host] = now + HOST_PROBE_INTERVAL.total_seconds()
+        return due
+
+    def success(self, host: str, elapsed: float) -> None:
+        if self._errors[host]:
+            _LOGGER.info("QWeather API host %s recovered", host)
+            self._errors[host] = 0
+        latency = self._latency[host]
+        self._latency[host] = latency + HOST_LATENCY_WEIGHT * (elapsed - latency) if math.isfinite(latency) else elapsed
+
+    def failure(self, host: str) -> None:
+        if not self._errors[host]:
+            _LOGGER.warning("QWeather API host %s failed", host)
+            self._probe_at[host] = time.monotonic() + HOST_PROBE_INTERVAL.total_seconds()
+        self._errors[host] += 1
+
 
 class QWeatherClient:
     dev_api_v7: str
 
-    _wait_until: float = 0
+    wait_until: float
+    scheme: str = "https"
 
     def __init__(
         self,
         session: ClientSession,
         api_host: str,
-        api_key: str,
+        api_key: str | None,
         longitude: str,
         latitude: str,
         grid_weather: bool,
+        *,
+        indices: Iterable[str] = (),
+        jwt_auth: QWeatherJwt | None = None,
+        hedge: bool = False,
+        cassette: Cassette | None = None,
+        daily_days: int = 7,
+        warning_list: QWeatherWarningList | None = None,
+        location_id: str | None = None,
+        wait_until: float = 0,
+        on_backoff: Callable[[float], None] | None = None,
     ) -> None:
         super().__init__()
-        self.api_host = api_host
+        # 多个 Host 以逗号分隔，第一个为主 Host
+        self.hosts = QWeatherHosts(host.strip() for host in api_host.split(",") if host.strip())
+        self.api_host = self.hosts.hosts[0]
+        self._probes: set[asyncio.Task] = set()
         self.http = session
-        self.params = {"location": f"{longitude},{latitude}", "key": api_key}
+        self.jwt_auth = jwt_auth
+        self.params = {"location": f"{longitude},{latitude}"}
+        if jwt_auth is None:
+            self.params["key"] = api_key
         self.longitude = longitude
         self.latitude = latitude
         self.weather_type = "grid-weather" if grid_weather else "weather"
+        self.indices = ",".join(indices)
+        self._indices_1d: dict[str, IndicesDailyItem] = {}
+        self.hedge = hedge
+        self._latencies: defaultdict[str, deque[float]] = defaultdict(lambda: deque(maxlen=100))
+        self._requests = 0
+        self._hedges = 0
+        self.cassette = cassette
+        if grid_weather and daily_days > 7:
+            _LOGGER.warning("Grid weather only provides 7 days of daily forecast")
+            daily_days = 7
+        self.daily_days = daily_days
+        self._daily_long: list[DailyForecast] = []
+        self._daily_long_until: float = 0
+        self.warning_list = warning_list
+        self.location_id = location_id
+        self._location_id_retry_at: float = 0
+        self._location_id_lock = asyncio.Lock()
+        # 降水风险，None 表示尚未获取
+        self._precip_now: bool | None = None
+        self._precip_ahead = False
+        self._precip_ahead_until: float = 0
+        self._precip_minutely: bool | None = None
+        self._visited: OrderedDict[str, tuple] = OrderedDict()
+        self.wait_until = wait_until
+        self.on_backoff = on_backoff
+
+    def retarget(self, longitude: str, latitude: str) -> None:
+        """切换查询位置
+
+        当前位置的慢变数据（远期预报、生活指数、LocationID）按格点缓存，回到访问过的格点时直接复用。
+        """
+        location = f"{longitude},{latitude}"
+        current = self.params["location"]
+        if location == current:
+            return
+        self._visited[current] = (self._daily_long, self._daily_long_until, self._indices_1d, self.location_id)
+        self._visited.move_to_end(current)
+        while len(self._visited) > VISITED_CELLS:
+            self._visited.popitem(last=False)
+        self._daily_long, self._daily_long_until, self._indices_1d, self.location_id = self._visited.pop(
+            location, ([], 0, {}, None)
+        )
+        self._precip_now = self._precip_minutely = None
+        self._precip_ahead_until = 0
+        self._location_id_retry_at = 0
+        self.params["location"] = location
+        self.longitude = longitude
+        self.latitude = latitude
 
     async def update_observation(self) -> RealtimeWeather | None:
         """城市天气/格点天气 - 实时天气"""
-        json_data = await self.api_get_v7(f"{self.weather_type}/now")
-        return json_data.get("now") if json_data else None
+        json_data = await self.api_get_v7(f"{self.weather_type}/now", await self._city_location())
+        if not json_data:
+            return None
+        now: RealtimeWeather = json_data.get("now")
+        if now:
+            self._precip_now = is_precipitation(now["icon"]) or float(now.get("precip") or 0) > 0
+        return now
 
     async def update_daily_forecast(self) -> list[DailyForecast]:
-        """城市天气/格点天气 - 每日天气预报"""
-        json_data = await self.api_get_v7(f"{self.weather_type}/7d")
-        return json_data.get("daily", []) if json_data else []
+        """城市天气/格点天气 - 每日天气预报
+
+        远期预报按 fxDate 与近期预报合并，近期的数据优先。
+        """
+        now = datetime.now().timestamp()
+        if now >= self._daily_long_until:
+            json_data = await self.api_get_v7(f"{self.weather_type}/{self.daily_days}d", await self._city_location())
+            if json_data:
+                self._daily_long = [compact_daily(daily) for daily in json_data.get("daily", [])]
+                self._daily_long_until = now + DAILY_LONG_RANGE_INTERVAL.total_seconds()
+                return self._daily_long
+
+        json_data = await self.api_get_v7(f"{self.weather_type}/{DAILY_SHORT_RANGE}d", await self._city_location())
+        short_range: list[DailyForecast] = json_data.get("daily", []) if json_data else []
+        if not short_range:
+            return self._daily_long
+        first_date = short_range[0]["fxDate"]
+        merged = {daily["fxDate"]: daily for daily in self._daily_long if daily["fxDate"] >= first_date}
+        merged.update((daily["fxDate"], daily) for daily in short_range)
+        return sorted(merged.values(), key=lambda daily: daily["fxDate"])
 
     async def update_hourly_forecast(self) -> list[HourlyForecast]:
         """城市天气/格点天气 - 逐小时天气预报"""
-        json_data = await self.api_get_v7(f"{self.weather_type}/24h")
-        return json_data.get("hourly", []) if json_data else []
+        json_data = await self.api_get_v7(f"{self.weather_type}/24h", await self._city_location())
+        hourly: list[HourlyForecast] = json_data.get("hourly", []) if json_data else []
+        if hourly:
+            # 格点天气没有降水概率，只看天气图标和降水量
+            self._precip_ahead = any(
+                is_precipitation(hour["icon"])
+                or float(hour.get("precip") or 0) > 0
+                or int(hour.get("pop") or 0) >= PRECIP_POP_THRESHOLD
+                for hour in hourly[:PRECIP_LOOKAHEAD_HOURS]
+            )
+            self._precip_ahead_until = datetime.now().timestamp() + PRECIP_AHEAD_MAX_AGE.total_seconds()
+        return hourly
 
     async def update_air_now(self) -> AirQualityNow | None:
         """空气质量-实时空气质量"""
@@ -63,6 +352,8 @@ class QWeatherClient:
     async def update_minutely_precipitation(self) -> MinutelyPrecipitation:
         """分钟预报-分钟级降水"""
         json_data = await self.api_get_v7("minutely/5m")
+        if json_data:
+            self._precip_minutely = any(float(item["precip"]) > 0 for item in json_data.get("minutely", []))
         return (
             MinutelyPrecipitation(
                 summary=json_data.get("summary", ""),
@@ -72,35 +363,88 @@ class QWeatherClient:
             else MinutelyPrecipitation(summary="", minutely=[])
         )
 
+    def minutely_interval(self) -> timedelta:
+        """根据实况、分钟级降水和近期的逐小时预报判断下一次分钟级降水的轮询间隔"""
+        precip_ahead = self._precip_ahead and datetime.now().timestamp() < self._precip_ahead_until
+        if self._precip_now or self._precip_minutely or precip_ahead:
+            return MINUTELY_WET_INTERVAL
+        if self._precip_now is None or self._precip_minutely is None:
+            return MINUTELY_INTERVAL
+        return MINUTELY_DRY_INTERVAL
+
     async def update_warning_now(self) -> list[WeatherWarning]:
         """预警-天气灾害预警"""
-        json_data = await self.api_get_v7("warning/now")
+        if self.warning_list and self.warning_list.shared and await self.async_resolve_location_id():
+            warnings = await self.warning_list.warnings(self, self.location_id)
+            if warnings is not None:
+                return warnings
+        json_data = await self.api_get_v7("warning/now", await self._city_location())
         return json_data.get("warning", []) if json_data else []
 
-    async def update_indices_1d(self) -> list[IndicesDailyItem]:
-        """天气指数-天气指数预报"""
-        json_data = await self.api_get_v7("indices/1d", {"type": "0"})
-        return json_data.get("daily", []) if json_data else []
+    async def async_resolve_location_id(self) -> str | None:
+        """城市搜索-城市信息查询，结果在客户端生命周期内缓存，切换位置后重新查询"""
+        async with self._location_id_lock:
+            if self.location_id is None and datetime.now().timestamp() >= self._location_id_retry_at:
+                json_data = await self.api_get("geo/v2/city/lookup")
+                if json_data and json_data.get("location"):
+                    self.location_id = json_data["location"][0]["id"]
+                else:
+                    self._location_id_retry_at = datetime.now().timestamp() + LOCATION_ID_RETRY_INTERVAL.total_seconds()
+        return self.location_id
+
+    async def _city_location(self) -> dict[str, str] | None:
+        """城市天气按 LocationID 查询，省去服务端每次按坐标查找城市；格点天气只支持坐标"""
+        if self.weather_type == "weather" and await self.async_resolve_location_id():
+            return {"location": self.location_id}
+        return None
+
+    async def update_historical_weather(self, day: date) -> list[HistoricalHourlyWeather]:
+        """时光机-历史天气，可查询最近 10 天（不含今天）的逐小时实况，仅支持 LocationID"""
+        if not await self.async_resolve_location_id():
+            return []
+        json_data = await self.api_get_v7(
+            "historical/weather", {"location": self.location_id, "date": day.strftime("%Y%m%d")}
+        )
+        return json_data.get("weatherHourly", []) if json_data else []
+
+    async def update_indices_1d(self) -> dict[str, IndicesDailyItem]:
+        """天气指数-天气指数预报
+
+        指数每天只发布一次，缓存的数据日期仍是今天时不再请求。
+        """
+        if not self.indices:
+            return {}
+        if self._indices_1d and next(iter(self._indices_1d.values()))["date"] == dt_util.now().date().isoformat():
+            return self._indices_1d
+        json_data = await self.api_get_v7("indices/1d", {**(await self._city_location() or {}), "type": self.indices})
+        if json_data:
+            self._indices_1d = {item["type"]: item for item in json_data.get("daily", [])}
+        return self._indices_1d
 
     async def api_get_v7(self, api: str, extra_params: Mapping[str, str] | None = None) -> dict | None:
-        return await self.url_get(f"https://{self.api_host}/v7/{api}", extra_params)
+        return await self.url_get(f"v7/{api}", extra_params)
 
     async def api_get(self, api: str, extra_params: Mapping[str, str] | None = None) -> dict | None:
-        return await self.url_get(f"https://{self.api_host}/{api}", extra_params)
+        return await self.url_get(api, extra_params)
 
     async def url_get(self, url: str, extra_params: Mapping[str, str] | None = None) -> dict | None:
-        if datetime.now().timestamp() < self._wait_until:
+        """请求相对于 API Host 的路径，由 _get 选择 Host"""
+        if datetime.now().timestamp() < self.wait_until:
             return None
 
         params = {**self.params, **extra_params} if extra_params else self.params
-        response = await self.http.get(url, params=params)
+        try:
+            response = await self._get(url, params)
+        except CassetteMiss as err:
+            _LOGGER.warning("Request not found in cassette: %s", err)
+            return None
         if response.status == HTTPStatus.OK:
             json_data = await response.json()
             if not json_data:
                 _LOGGER.warning("Empty response from: %s", url)
                 return None
             if "code" in json_data and json_data["code"] != "200":  # v1 error code
-                self._wait_until = parse_v1_error(json_data)
+                self._backoff(parse_v1_error(json_data))
                 return None
             return json_data
         if response.status == HTTPStatus.BAD_REQUEST:
@@ -111,35 +455,161 @@ class QWeatherClient:
                     _LOGGER.error("%s invalidParams:%s (%s)", error["detail"], error["invalidParams"], error["type"])
                 else:
                     _LOGGER.error("%s (%s)", error["detail"], error["type"])
-            self._wait_until = math.inf
+            self._backoff(math.inf)
             return None
         if response.status == HTTPStatus.UNAUTHORIZED:
             _LOGGER.error("%s %s", response.status, url)
-            self._wait_until = math.inf
+            self._backoff(math.inf)
             return None
         if response.status == HTTPStatus.FORBIDDEN:
             _LOGGER.error("%s %s", response.status, url)
             json_data = await response.json()
             if error := json_data["error"]:
                 _LOGGER.error("%s (%s)", error["detail"], error["type"])
-            self._wait_until = math.inf
+            self._backoff(math.inf)
             return None
         if response.status == HTTPStatus.NOT_FOUND:
             _LOGGER.error("%s %s", response.status, url)
-            self._wait_until = math.inf
+            self._backoff(math.inf)
             return None
         if response.status == HTTPStatus.TOO_MANY_REQUESTS:
             _LOGGER.error("%s %s", response.status, url)
-            self._wait_until = datetime.now().timestamp() + 60
+            self._backoff(datetime.now().timestamp() + 60)
             return None
         if response.status == HTTPStatus.INTERNAL_SERVER_ERROR:
             _LOGGER.error("%s %s", response.status, url)
-            self._wait_until = datetime.now().timestamp() + 60
+            self._backoff(datetime.now().timestamp() + 60)
             return None
         _LOGGER.error("%s %s", response.status, url)
-        self._wait_until = datetime.now().timestamp() + 600
+        self._backoff(datetime.now().timestamp() + 600)
         return None
 
+    def _backoff(self, wait_until: float) -> None:
+        self.wait_until = wait_until
+        if self.on_backoff:
+            self.on_backoff(wait_until)
+
+    def _url(self, host: str, path: str) -> str:
+        return f"{self.scheme}://{host}/{path}"
+
+    async def _get(self, path: str, params: Mapping[str, str]) -> ClientResponse | CassetteResponse:
+        # 磁带始终以主 Host 记录，回放与实际使用哪个 Host 无关
+        url = self._url(self.api_host, path)
+        if self.cassette and self.cassette.replaying:
+            return await self.cassette.play(url, params)
+
+        start = time.monotonic()
+        headers = self.jwt_auth.headers if self.jwt_auth else None
+        for host in self.hosts.due_for_probe():
+            self._probe(host, path, params, headers)
+        hosts = self.hosts.ordered()
+        if self.hedge:
+            response = await self._hedged_get(path, params, headers, hosts)
+        else:
+            response = await self._failover_get(path, params, headers, hosts)
+        if self.cassette and self.cassette.recording:
+            await self.cassette.record(url, params, response, time.monotonic() - start)
+        return response
+
+    async def _timed_get(
+        self, host: str, path: str, params: Mapping[str, str], headers: Mapping[str, str] | None
+    ) -> ClientResponse:
+        start = time.monotonic()
+        try:
+            response = await self.http.get(self._url(host, path), params=params, headers=headers)
+            await response.read()
+        except (ClientError, TimeoutError):
+            self.hosts.failure(host)
+            raise
+        elapsed = time.monotonic() - start
+        if response.status in FAILOVER_STATUSES:
+            self.hosts.failure(host)
+        else:
+            self.hosts.success(host, elapsed)
+            self._latencies[path].append(elapsed)
+        return response
+
+    async def _failover_get(
+        self, path: str, params: Mapping[str, str], headers: Mapping[str, str] | None, hosts: list[str]
+    ) -> ClientResponse:
+        """依次尝试各个 Host，直到得到不需要切换 Host 的响应"""
+        for host in hosts[:-1]:
+            try:
+                response = await self._timed_get(host, path, params, headers)
+            except (ClientError, TimeoutError) as err:
+                _LOGGER.debug("%s %s failed, trying next host: %r", host, path, err)
+                continue
+            if response.status not in FAILOVER_STATUSES:
+                return response
+            _LOGGER.debug("%s %s returned %s, trying next host", host, path, response.status)
+        return await self._timed_get(hosts[-1], path, params, headers)
+
+    def _probe(self, host: str, path: str, params: Mapping[str, str], headers: Mapping[str, str] | None) -> None:
+        """在后台向出错的 Host 重发当前请求，结果只用于更新 Host 状态"""
+        task = asyncio.create_task(self._timed_get(host, path, params, headers))
+        self._probes.add(task)
+        task.add_done_callback(self._probe_done)
+
+    def _probe_done(self, task: asyncio.Task) -> None:
+        self._probes.discard(task)
+        if not task.cancelled() and task.exception():
+            _LOGGER.debug("Probe failed: %r", task.exception())
+
+    def cancel_probes(self) -> None:
+        for task in list(self._probes):
+            task.cancel()
+
+    def _hedge_delay(self, path: str) -> float | None:
+        """该接口近期耗时的 p95；样本不足或超出对冲预算时不对冲"""
+        latencies = self._latencies[path]
+        if len(latencies) < HEDGE_MIN_SAMPLES or self._hedges >= self._requests * HEDGE_BUDGET:
+            return None
+        p95 = sorted(latencies)[int(len(latencies) * 0.95)]
+        return max(p95, HEDGE_MIN_DELAY)
+
+    async def _hedged_get(
+        self, path: str, params: Mapping[str, str], headers: Mapping[str, str] | None, hosts: list[str]
+    ) -> ClientResponse:
+        self._requests += 1
+        delay = self._hedge_delay(path)
+        primary = asyncio.create_task(self._failover_get(path, params, headers, hosts))
+        if delay is None:
+            return await primary
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            self._hedges += 1
+            _LOGGER.debug("Hedging %s after %.2fs (%d/%d)", path, delay, self._hedges, self._requests)
+            # 有多个 Host 时对冲请求优先发往次优的 Host
+            hedge = asyncio.create_task(self._failover_get(path, params, headers, hosts[1:] + hosts[:1]))
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status == HTTPStatus.OK:
+                        return task.result()
+        finally:
+            # 调用方被取消（如卸载条目）时也取消仍在进行的请求
+            for task in pending:
+                task.cancel()
+        for task in (primary, hedge):
+            if task.exception() is None:
+                return task.result()
+        return primary.result()
+
+
+def compact_daily(daily: DailyForecast) -> DailyForecast:
+    """各位置、各天的取值大量重复，驻留后共用同一个字符串对象"""
+    return {field: sys.intern(daily[field]) for field in DAILY_CACHED_FIELDS if daily.get(field) is not None}
+
+
+def is_precipitation(icon: str) -> bool:
+    """天气图标 3xx 为雨，4xx 为雪 https://dev.qweather.com/docs/resource/icons/"""
+    return icon[:1] in {"3", "4"}
+
 
 def parse_v1_error(json_data):
     code = json_data.get("code")
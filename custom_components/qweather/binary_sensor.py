@@ -65,6 +65,12 @@ class QBinarySensor(CoordinatorEntity, BinarySensorEntity, Generic[_DataT]):
 
 
 class QWeatherWarningBinarySensor(QBinarySensor):
+    """天气灾害预警
+
+    属性只保留预警的 id、类型和等级，每次状态变化都会写入数据库；标题和正文较长，
+    通过 qweather.get_warnings 服务或 qweather/warnings websocket 命令从协调器数据中查询。
+    """
+
     _attr_extra_state_attributes: MutableMapping[str, Any]
 
     def __init__(
@@ -90,8 +96,9 @@ class QWeatherWarningBinarySensor(QBinarySensor):
         self._attr_extra_state_attributes = {
             "warning": [
                 {
-                    "title": warning.get("title"),
-                    "text": warning.get("text"),
+                    "id": warning.get("id"),
+                    "type": warning.get("type"),
+                    "severity": warning.get("severity"),
                 }
                 for warning in data
             ],
@@ -0,0 +1,110 @@
+import asyncio
+from collections import defaultdict
+from collections.abc import Mapping
+import json
+import logging
+from pathlib import Path
+from typing import Any, Literal, TypedDict
+
+from aiohttp import ClientResponse
+
+_LOGGER = logging.getLogger(__name__)
+
+# 录制时不写入鉴权参数
+_SECRET_PARAMS = frozenset({"key"})
+
+
+class CassetteEntry(TypedDict):
+    url: str
+    params: dict[str, str]
+    status: int
+    headers: dict[str, str]
+    body: str
+    elapsed: float
+
+
+class CassetteMiss(LookupError):
+    """回放时磁带中没有对应的请求"""
+
+
+class CassetteResponse:
+    """回放的响应，提供 url_get 用到的 ClientResponse 接口"""
+
+    def __init__(self, entry: CassetteEntry) -> None:
+        self.status = entry["status"]
+        self.headers = entry["headers"]
+        self._body = entry["body"]
+
+    async def read(self) -> bytes:
+        return self._body.encode()
+
+    async def text(self) -> str:
+        return self._body
+
+    async def json(self) -> Any:
+        return json.loads(self._body) if self._body else None
+
+
+def _request_key(url: str, params: Mapping[str, str]) -> str:
+    return url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()) if k not in _SECRET_PARAMS)
+
+
+class Cassette:
+    """录制/回放 QWeatherClient 的请求
+
+    录制模式下每个请求和响应以一行 JSON 追加到文件；回放模式下按请求顺序返回录制的响应，
+    同一请求录制多次时依次轮换，并按 time_scale 缩放原始耗时（0 表示立即返回）。
+    """
+
+    def __init__(self, path: Path, mode: Literal["record", "replay"], time_scale: float = 1.0) -> None:
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self._entries: defaultdict[str, list[CassetteEntry]] = defaultdict(list)
+        self._positions: defaultdict[str, int] = defaultdict(int)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @classmethod
+    def load(cls, path: Path, time_scale: float = 1.0) -> "Cassette":
+        """读取磁带文件用于回放（阻塞 IO）"""
+        cassette = cls(path, "replay", time_scale)
+        with path.open(encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    entry: CassetteEntry = json.loads(line)
+                    cassette._entries[_request_key(entry["url"], entry["params"])].append(entry)
+        return cassette
+
+    async def play(self, url: str, params: Mapping[str, str]) -> CassetteResponse:
+        key = _request_key(url, params)
+        entries = self._entries.get(key)
+        if not entries:
+            raise CassetteMiss(key)
+        entry = entries[self._positions[key] % len(entries)]
+        self._positions[key] += 1
+        if self.time_scale:
+            await asyncio.sleep(entry["elapsed"] * self.time_scale)
+        return CassetteResponse(entry)
+
+    async def record(self, url: str, params: Mapping[str, str], response: ClientResponse, elapsed: float) -> None:
+        entry = CassetteEntry(
+            url=url,
+            params={k: v for k, v in params.items() if k not in _SECRET_PARAMS},
+            status=response.status,
+            headers={k: v for k, v in response.headers.items() if k in {"Content-Type", "Date"}},
+            body=(await response.read()).decode(),
+            elapsed=round(elapsed, 3),
+        )
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        await asyncio.get_running_loop().run_in_executor(None, self._append, line)
+
+    def _append(self, line: str) -> None:
+        with self.path.open("a", encoding="utf-8") as file:
+            file.write(line)
@@ -9,8 +9,31 @@ from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE, CON
 from homeassistant.core import callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
-
-from .const import CONF_API_HOST, CONF_GRID, DOMAIN
+from homeassistant.helpers.selector import EntitySelector, EntitySelectorConfig, TextSelector, TextSelectorConfig
+
+from .api import QWeatherJwt
+from .const import (
+    CASSETTE_MODES,
+    CONF_API_HOST,
+    CONF_BULK_WARNING,
+    CONF_CASSETTE,
+    CONF_CASSETTE_TIME_SCALE,
+    CONF_DAILY_DAYS,
+    CONF_GRID,
+    CONF_HEDGE,
+    CONF_HISTORY,
+    CONF_INDICES,
+    CONF_JWT_KEY_ID,
+    CONF_JWT_PRIVATE_KEY,
+    CONF_JWT_PROJECT_ID,
+    CONF_LOCATION_ID,
+    CONF_REFRESH_WAVES,
+    CONF_TRACKED_ENTITY,
+    DAILY_DAYS,
+    DEFAULT_INDICES,
+    DOMAIN,
+    INDICES_TYPES,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,32 +50,62 @@ class QWeatherFlowHandler(ConfigFlow, domain=DOMAIN):
             await self.async_set_unique_id(f"{longitude}_{latitude}".replace(".", "_"))
             self._abort_if_unique_id_configured()
 
-            """城市搜索-城市信息查询"""
-            geo_url = f"https://{api_host}/geo/v2/city/lookup"
-            params = {
-                "location": f"{longitude},{latitude}",
-                "key": user_input[CONF_API_KEY],
+            api_key = user_input.get(CONF_API_KEY, "")
+            jwt_data = {
+                key: user_input[key]
+                for key in (CONF_JWT_PROJECT_ID, CONF_JWT_KEY_ID, CONF_JWT_PRIVATE_KEY)
+                if user_input.get(key)
             }
-            session = async_get_clientsession(self.hass)
-            resp = await session.get(geo_url, params=params)
-            if resp.status == HTTPStatus.OK:
-                # noinspection PyTypeChecker
-                return self.async_create_entry(
-                    title=user_input[CONF_NAME],
-                    data={
-                        CONF_API_HOST: api_host,
-                        CONF_NAME: user_input[CONF_NAME],
-                        CONF_API_KEY: user_input[CONF_API_KEY],
-                        CONF_LONGITUDE: user_input[CONF_LONGITUDE],
-                        CONF_LATITUDE: user_input[CONF_LATITUDE],
-                    },
-                    options={
-                        CONF_GRID: use_grid,
-                    },
-                )
-
-            _LOGGER.warning("Failed to communicate with QWeather: %s", resp.status)
-            errors["base"] = "communication"
+
+            """城市搜索-城市信息查询"""
+            # 多个 Host 以逗号分隔时用主 Host 验证
+            geo_url = f"https://{api_host.split(',')[0].strip()}/geo/v2/city/lookup"
+            params = {"location": f"{longitude},{latitude}"}
+            headers = None
+            if len(jwt_data) == 3:
+                try:
+                    jwt_auth = QWeatherJwt(
+                        jwt_data[CONF_JWT_PROJECT_ID], jwt_data[CONF_JWT_KEY_ID], jwt_data[CONF_JWT_PRIVATE_KEY]
+                    )
+                except (TypeError, ValueError):
+                    _LOGGER.warning("Invalid JWT private key")
+                    errors["base"] = "invalid_private_key"
+                else:
+                    headers = jwt_auth.headers
+                    api_key = ""
+            elif api_key:
+                params["key"] = api_key
+                jwt_data = {}
+            else:
+                errors["base"] = "missing_credentials"
+
+            if not errors:
+                session = async_get_clientsession(self.hass)
+                resp = await session.get(geo_url, params=params, headers=headers)
+                if resp.status == HTTPStatus.OK:
+                    # 保存查询到的 LocationID，城市天气直接按 LocationID 请求
+                    json_data = await resp.json()
+                    location_id = json_data["location"][0]["id"] if json_data and json_data.get("location") else None
+                    # noinspection PyTypeChecker
+                    return self.async_create_entry(
+                        title=user_input[CONF_NAME],
+                        data={
+                            CONF_API_HOST: api_host,
+                            CONF_NAME: user_input[CONF_NAME],
+                            CONF_API_KEY: api_key,
+                            **jwt_data,
+                            CONF_LONGITUDE: user_input[CONF_LONGITUDE],
+                            CONF_LATITUDE: user_input[CONF_LATITUDE],
+                            CONF_LOCATION_ID: location_id,
+                        },
+                        options={
+                            CONF_GRID: use_grid,
+                            CONF_INDICES: DEFAULT_INDICES,
+                        },
+                    )
+
+                _LOGGER.warning("Failed to communicate with QWeather: %s", resp.status)
+                errors["base"] = "communication"
 
         my = self.hass.config
         # noinspection PyTypeChecker
@@ -61,7 +114,10 @@ class QWeatherFlowHandler(ConfigFlow, domain=DOMAIN):
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_API_HOST): str,
-                    vol.Required(CONF_API_KEY): str,
+                    vol.Optional(CONF_API_KEY): str,
+                    vol.Optional(CONF_JWT_PROJECT_ID): str,
+                    vol.Optional(CONF_JWT_KEY_ID): str,
+                    vol.Optional(CONF_JWT_PRIVATE_KEY): TextSelector(TextSelectorConfig(multiline=True)),
                     vol.Required(CONF_LONGITUDE, default=my.longitude): cv.longitude,
                     vol.Required(CONF_LATITUDE, default=my.latitude): cv.latitude,
                     vol.Required(CONF_NAME, default=my.location_name): str,
@@ -87,6 +143,15 @@ class QWeatherOptionsFlow(OptionsFlow):
     def __init__(self, config_entry: ConfigEntry) -> None:
         """Initialize Qweather options flow."""
         self.use_grid = config_entry.options.get(CONF_GRID, False)
+        self.daily_days = config_entry.options.get(CONF_DAILY_DAYS, 7)
+        self.indices = config_entry.options.get(CONF_INDICES, DEFAULT_INDICES)
+        self.hedge = config_entry.options.get(CONF_HEDGE, False)
+        self.bulk_warning = config_entry.options.get(CONF_BULK_WARNING, False)
+        self.cassette = config_entry.options.get(CONF_CASSETTE, "off")
+        self.cassette_time_scale = config_entry.options.get(CONF_CASSETTE_TIME_SCALE, 1.0)
+        self.tracked_entity = config_entry.options.get(CONF_TRACKED_ENTITY)
+        self.history = config_entry.options.get(CONF_HISTORY, False)
+        self.refresh_waves = config_entry.options.get(CONF_REFRESH_WAVES, False)
 
     async def async_step_init(self, user_input=None) -> ConfigFlowResult:
         """Handle a flow initialized by the user."""
@@ -100,6 +165,19 @@ class QWeatherOptionsFlow(OptionsFlow):
             data_schema=vol.Schema(
                 {
                     vol.Optional(CONF_GRID, default=self.use_grid): bool,
+                    vol.Optional(CONF_DAILY_DAYS, default=self.daily_days): vol.In(DAILY_DAYS),
+                    vol.Optional(CONF_INDICES, default=self.indices): cv.multi_select(INDICES_TYPES),
+                    vol.Optional(CONF_BULK_WARNING, default=self.bulk_warning): bool,
+                    vol.Optional(
+                        CONF_TRACKED_ENTITY, description={"suggested_value": self.tracked_entity}
+                    ): EntitySelector(EntitySelectorConfig(domain=["device_tracker", "person"])),
+                    vol.Optional(CONF_HISTORY, default=self.history): bool,
+                    vol.Optional(CONF_HEDGE, default=self.hedge): bool,
+                    vol.Optional(CONF_REFRESH_WAVES, default=self.refresh_waves): bool,
+                    vol.Optional(CONF_CASSETTE, default=self.cassette): vol.In(CASSETTE_MODES),
+                    vol.Optional(CONF_CASSETTE_TIME_SCALE, default=self.cassette_time_scale): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
                 }
             ),
         )
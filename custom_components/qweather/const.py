@@ -1,12 +1,54 @@
 from typing import Literal, TypedDict
 
 DOMAIN = "qweather"
+STORAGE_VERSION = 1
 
 ATTRIBUTION = "Data provided by Qweather"
 MANUFACTURER = "Qweather, Inc."
 
 CONF_API_HOST = "api_host"
 CONF_GRID = "grid_weather"
+CONF_INDICES = "indices"
+CONF_HEDGE = "hedge_requests"
+CONF_CASSETTE = "cassette"
+CONF_CASSETTE_TIME_SCALE = "cassette_time_scale"
+CONF_DAILY_DAYS = "daily_days"
+CONF_BULK_WARNING = "bulk_warning"
+CONF_TRACKED_ENTITY = "tracked_entity"
+CONF_HISTORY = "history_statistics"
+CONF_LOCATION_ID = "location_id"
+CONF_REFRESH_WAVES = "refresh_waves"
+
+# 预警城市列表目前只支持中国
+WARNING_LIST_RANGE = "cn"
+
+DAILY_DAYS = [7, 10, 15, 30]
+CASSETTE_MODES = ["off", "record", "replay"]
+CASSETTE_FILE = "qweather_cassette.jsonl"
+CONF_JWT_PROJECT_ID = "jwt_project_id"
+CONF_JWT_KEY_ID = "jwt_key_id"
+CONF_JWT_PRIVATE_KEY = "jwt_private_key"
+
+# https://dev.qweather.com/docs/resource/indices-info/
+INDICES_TYPES = {
+    "1": "运动指数",
+    "2": "洗车指数",
+    "3": "穿衣指数",
+    "4": "钓鱼指数",
+    "5": "紫外线指数",
+    "6": "旅游指数",
+    "7": "花粉过敏指数",
+    "8": "舒适度指数",
+    "9": "感冒指数",
+    "10": "空气污染扩散条件指数",
+    "11": "空调开启指数",
+    "12": "太阳镜指数",
+    "13": "化妆指数",
+    "14": "晾晒指数",
+    "15": "交通指数",
+    "16": "防晒指数",
+}
+DEFAULT_INDICES = ["1", "2", "3", "5", "9"]
 
 
 class RealtimeWeather(TypedDict):
@@ -80,6 +122,22 @@ class HourlyForecast(TypedDict):
     dew: str | None  # "-25"
 
 
+class HistoricalHourlyWeather(TypedDict):
+    """https://dev.qweather.com/docs/api/time-machine/time-machine-weather/"""
+
+    time: str  # "2020-07-25T00:00+08:00",
+    temp: str  # "21",
+    icon: str  # "101",
+    text: str  # "多云",
+    precip: str  # "0.0",
+    wind360: str  # "353",
+    windDir: str  # "北风",
+    windScale: str  # "1-2",
+    windSpeed: str  # "4",
+    humidity: str  # "86",
+    pressure: str  # "1000"
+
+
 class AirQualityNowColor(TypedDict):
     red: int
     green: int
@@ -0,0 +1,137 @@
+import asyncio
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+import logging
+from typing import NamedTuple
+
+from slugify import slugify
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMeanType, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics, get_last_statistics
+from homeassistant.const import PERCENTAGE, UnitOfLength, UnitOfTemperature
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .api import QWeatherClient
+from .const import DOMAIN, HistoricalHourlyWeather
+
+_LOGGER = logging.getLogger(__name__)
+
+# 历史天气只提供最近 10 天（不含今天）的数据
+HISTORY_DAYS = 10
+BACKFILL_INTERVAL = timedelta(hours=6)
+
+
+class Series(NamedTuple):
+    key: str
+    field: str
+    unit: str
+    unit_class: str | None
+    has_sum: bool
+
+
+SERIES = (
+    Series("temperature", "temp", UnitOfTemperature.CELSIUS, "temperature", False),
+    Series("humidity", "humidity", PERCENTAGE, None, False),
+    Series("precipitation", "precip", UnitOfLength.MILLIMETERS, "distance", True),
+)
+
+
+class LastStatistic(NamedTuple):
+    start: float  # 时间戳；没有统计时为 0
+    sum: float
+
+
+class HistoryBackfill:
+    """把历史天气的逐小时实况补录为外部长期统计
+
+    从每个统计最后一条记录之后开始，按天请求缺失的历史天气，逐条转换后每个统计一次性批量写入，
+    不经过状态机。某一天请求失败时只写入它之前的连续数据，下次补录从缺口处继续。
+    """
+
+    def __init__(self, hass: HomeAssistant, client: QWeatherClient, name: str) -> None:
+        self.hass = hass
+        self.client = client
+        self.name = name
+        self.object_id = slugify(name, separator="_")
+        self._lock = asyncio.Lock()
+
+    def statistic_id(self, series: Series) -> str:
+        return f"{DOMAIN}:{self.object_id}_{series.key}"
+
+    def metadata(self, series: Series) -> StatisticMetaData:
+        return StatisticMetaData(
+            mean_type=StatisticMeanType.NONE if series.has_sum else StatisticMeanType.ARITHMETIC,
+            has_sum=series.has_sum,
+            name=f"{self.name} {series.key}",
+            source=DOMAIN,
+            statistic_id=self.statistic_id(series),
+            unit_class=series.unit_class,
+            unit_of_measurement=series.unit,
+        )
+
+    async def async_backfill(self, _now: datetime | None = None) -> None:
+        if self._lock.locked():
+            return
+        async with self._lock:
+            last = {series.key: await self._async_last_statistic(series) for series in SERIES}
+            days = missing_days(min(stat.start for stat in last.values()), dt_util.now().date())
+            if not days:
+                return
+            _LOGGER.debug("[%s] Backfilling history for %s", self.name, [day.isoformat() for day in days])
+            responses = await asyncio.gather(*(self.client.update_historical_weather(day) for day in days))
+            rows = statistic_rows(contiguous(responses), last)
+            for series in SERIES:
+                if rows[series.key]:
+                    async_add_external_statistics(self.hass, self.metadata(series), rows[series.key])
+            _LOGGER.debug("[%s] Backfilled %d hours", self.name, len(rows[SERIES[0].key]))
+
+    async def _async_last_statistic(self, series: Series) -> LastStatistic:
+        statistic_id = self.statistic_id(series)
+        result = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, False, {"sum"}
+        )
+        if not result.get(statistic_id):
+            return LastStatistic(0, 0)
+        row = result[statistic_id][0]
+        return LastStatistic(row["start"], row.get("sum") or 0)
+
+
+def missing_days(last_start: float, today: date) -> list[date]:
+    """最后一条统计之后的一小时所在的日期到昨天，最多 HISTORY_DAYS 天"""
+    first = today - timedelta(days=HISTORY_DAYS)
+    if last_start:
+        next_hour = dt_util.utc_from_timestamp(last_start) + timedelta(hours=1)
+        first = max(first, dt_util.as_local(next_hour).date())
+    return [first + timedelta(days=offset) for offset in range((today - first).days)]
+
+
+def contiguous(responses: Iterable[list[HistoricalHourlyWeather]]) -> Iterable[HistoricalHourlyWeather]:
+    """按日期顺序逐条返回，遇到没有数据的一天即停止，避免在统计中留下缺口"""
+    for hourly in responses:
+        if not hourly:
+            return
+        yield from hourly
+
+
+def statistic_rows(
+    hourly: Iterable[HistoricalHourlyWeather], last: dict[str, LastStatistic]
+) -> dict[str, list[StatisticData]]:
+    rows: dict[str, list[StatisticData]] = {series.key: [] for series in SERIES}
+    sums = {key: stat.sum for key, stat in last.items()}
+    for hour in hourly:
+        start = dt_util.parse_datetime(hour["time"])
+        if start is None:
+            continue
+        timestamp = start.timestamp()
+        for series in SERIES:
+            if timestamp <= last[series.key].start or not hour.get(series.field):
+                continue
+            value = float(hour[series.field])
+            if series.has_sum:
+                sums[series.key] += value
+                rows[series.key].append(StatisticData(start=start, state=value, sum=sums[series.key]))
+            else:
+                rows[series.key].append(StatisticData(start=start, mean=value, min=value, max=value))
+    return rows
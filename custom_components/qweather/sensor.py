@@ -14,7 +14,7 @@ from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity, DataUpdateCoordinator
 
 from . import Coordinators, QWeatherConfigEntry
-from .const import DOMAIN
+from .const import CONF_INDICES, DEFAULT_INDICES, DOMAIN, IndicesDailyItem
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,11 +37,32 @@ async def async_setup_entry(
                 ),
                 config_entry,
                 lambda data: data.get("summary") if data else None,
-            )
+            ),
+            *(
+                QSensor(
+                    coordinators.indices_1d,
+                    SensorEntityDescription(
+                        key=f"indices_{index_type}",
+                        icon="mdi:clipboard-text-outline",
+                        translation_key=f"indices_{index_type}",
+                    ),
+                    config_entry,
+                    indices_category(index_type),
+                )
+                for index_type in config_entry.options.get(CONF_INDICES, DEFAULT_INDICES)
+            ),
         ]
     )
 
 
+def indices_category(index_type: str) -> Callable[[dict[str, IndicesDailyItem] | None], str | None]:
+    def value_func(data: dict[str, IndicesDailyItem] | None) -> str | None:
+        item = data.get(index_type) if data else None
+        return item["category"] if item else None
+
+    return value_func
+
+
 _DataT = TypeVar("_DataT")
 
 
@@ -0,0 +1,58 @@
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, WeatherWarning
+
+SERVICE_GET_WARNINGS = "get_warnings"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """预警全文只保存在协调器数据中，通过服务或 websocket 命令按需查询"""
+
+    async def async_get_warnings(call: ServiceCall) -> ServiceResponse:
+        return {"warnings": _warnings(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_WARNINGS,
+        async_get_warnings,
+        schema=vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string}),
+        supports_response=SupportsResponse.ONLY,
+    )
+    websocket_api.async_register_command(hass, websocket_warnings)
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/warnings", vol.Optional("entry_id"): str})
+@callback
+def websocket_warnings(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    try:
+        warnings = _warnings(hass, msg.get("entry_id"))
+    except ServiceValidationError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(err))
+        return
+    connection.send_result(msg["id"], {"warnings": warnings})
+
+
+def _warnings(hass: HomeAssistant, entry_id: str | None) -> list[WeatherWarning]:
+    """指定条目或所有已加载条目的当前预警，多个位置的同一条预警只返回一次"""
+    if entry_id is None:
+        entries = hass.config_entries.async_entries(DOMAIN)
+    elif entry := hass.config_entries.async_get_entry(entry_id):
+        entries = [entry]
+    else:
+        raise ServiceValidationError(f"Config entry not found: {entry_id}")
+
+    warnings: dict[str, WeatherWarning] = {}
+    for entry in entries:
+        if entry.state is ConfigEntryState.LOADED and entry.runtime_data.warning_now.data:
+            warnings.update((warning["id"], warning) for warning in entry.runtime_data.warning_now.data)
+    return list(warnings.values())
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+import logging
+import time
+from types import SimpleNamespace
+
+from aiohttp import (
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionCreateStartParams,
+    TraceConnectionReuseconnParams,
+    TraceDnsResolveHostEndParams,
+    TraceDnsResolveHostStartParams,
+    TraceRequestEndParams,
+    TraceRequestStartParams,
+)
+from aiohttp.hdrs import USER_AGENT
+
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util.ssl import get_default_context
+
+_LOGGER = logging.getLogger(__name__)
+
+# 同一轮刷新中的多个请求可以复用连接；轮询间隔以分钟计，空闲连接保留更久只会被服务端断开
+KEEPALIVE_TIMEOUT = 120
+DNS_CACHE_TTL = 3600
+LIMIT_PER_HOST = 4
+TIMEOUT = ClientTimeout(total=20, connect=5, sock_connect=5, sock_read=15)
+
+
+@dataclass
+class RequestTimings:
+    """请求耗时统计，用于观察连接复用效果"""
+
+    requests: int = 0
+    new_connections: int = 0
+    reused_connections: int = 0
+    dns_lookups: int = 0
+    dns_time: float = 0
+    connect_time: float = 0
+    request_time: float = 0
+
+    @property
+    def mean_connect_time(self) -> float:
+        return self.connect_time / self.new_connections if self.new_connections else 0
+
+    @property
+    def mean_request_time(self) -> float:
+        return self.request_time / self.requests if self.requests else 0
+
+    def trace_config(self) -> TraceConfig:
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_connection_create_start.append(self._on_connection_create_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_dns_resolvehost_start.append(self._on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(self._on_dns_resolvehost_end)
+        return trace_config
+
+    async def _on_request_start(
+        self, session: ClientSession, ctx: SimpleNamespace, params: TraceRequestStartParams
+    ) -> None:
+        ctx.request_start = time.perf_counter()
+        ctx.connect_time = 0
+
+    async def _on_request_end(
+        self, session: ClientSession, ctx: SimpleNamespace, params: TraceRequestEndParams
+    ) -> None:
+        elapsed = time.perf_counter() - ctx.request_start
+        self.requests += 1
+        self.request_time += elapsed
+        _LOGGER.debug(
+            "%s %s in %.3fs (connect %.3fs)", params.response.status, params.url.path, elapsed, ctx.connect_time
+        )
+
+    async def _on_connection_create_start(
+        self, session: ClientSession, ctx: SimpleNamespace, params: TraceConnectionCreateStartParams
+    ) -> None:
+        ctx.connect_start = time.perf_counter()
+
+    async def _on_connection_create_end(
+        self, session: ClientSession, ctx: SimpleNamespace, params: TraceConnectionCreateEndParams
+    ) -> None:
+        ctx.connect_time = time.perf_counter() - ctx.connect_start
+        self.new_connections += 1
+        self.connect_time += ctx.connect_time
+
+    async def _on_connection_reuseconn(
+        self, session: ClientSession, ctx: SimpleNamespace, params: TraceConnectionReuseconnParams
+    ) -> None:
+        self.reused_connections += 1
+
+    async def _on_dns_resolvehost_start(
+        self, session: ClientSession, ctx: SimpleNamespace, params: TraceDnsResolveHostStartParams
+    ) -> None:
+        ctx.dns_start = time.perf_counter()
+
+    async def _on_dns_resolvehost_end(
+        self, session: ClientSession, ctx: SimpleNamespace, params: TraceDnsResolveHostEndParams
+    ) -> None:
+        self.dns_lookups += 1
+        self.dns_time += time.perf_counter() - ctx.dns_start
+
+
+def create_session(timings: RequestTimings, limit_per_host: int = LIMIT_PER_HOST) -> ClientSession:
+    """为和风天气 API 创建独立的长连接会话，调用方负责关闭"""
+    connector = TCPConnector(
+        ssl=get_default_context(),
+        limit_per_host=limit_per_host,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    return ClientSession(
+        connector=connector,
+        timeout=TIMEOUT,
+        headers={USER_AGENT: SERVER_SOFTWARE},
+        trace_configs=[timings.trace_config()],
+    )
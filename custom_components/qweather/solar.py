@@ -0,0 +1,105 @@
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, timedelta
+from functools import lru_cache
+import math
+from typing import NamedTuple
+
+# 本地计算太阳位置，用于判断预报时段是白天还是夜间
+# https://gml.noaa.gov/grad/solcalc/solareqns.PDF
+
+# 日出日落时太阳中心的高度角：大气折射 34' + 太阳视半径 16'
+SUNRISE_ELEVATION = -0.833
+
+_J2000 = datetime(2000, 1, 1, 12, tzinfo=UTC)
+
+
+class SunTimes(NamedTuple):
+    sunrise: datetime | None  # UTC；极昼或极夜时为 None
+    sunset: datetime | None
+    polar_day: bool
+    declination: float  # 弧度
+    equation_of_time: float  # 分钟
+
+
+def solar_date(when: datetime, longitude: float) -> date:
+    """按地方平太阳时划分日期，使同一天的日出和日落落在同一个日期内"""
+    return (when.astimezone(UTC) + timedelta(minutes=4 * longitude)).date()
+
+
+@lru_cache(maxsize=1024)
+def sun_times(day: date, latitude: float, longitude: float) -> SunTimes:
+    """按地方平太阳时计算某一天的日出、日落，结果按天缓存"""
+    midnight = datetime(day.year, day.month, day.day, tzinfo=UTC)
+    approx_noon = midnight + timedelta(minutes=720 - 4 * longitude)
+    declination, equation_of_time = _solar_parameters(approx_noon)
+
+    lat = math.radians(latitude)
+    noon = 720 - 4 * longitude - equation_of_time
+    sin_elevation = math.sin(math.radians(SUNRISE_ELEVATION))
+    cos_hour_angle = (sin_elevation - math.sin(lat) * math.sin(declination)) / (math.cos(lat) * math.cos(declination))
+    if cos_hour_angle <= -1:
+        return SunTimes(None, None, True, declination, equation_of_time)
+    if cos_hour_angle >= 1:
+        return SunTimes(None, None, False, declination, equation_of_time)
+    half_day = 4 * math.degrees(math.acos(cos_hour_angle))
+    return SunTimes(
+        midnight + timedelta(minutes=noon - half_day),
+        midnight + timedelta(minutes=noon + half_day),
+        False,
+        declination,
+        equation_of_time,
+    )
+
+
+def sun_elevation(when: datetime, latitude: float, longitude: float) -> float:
+    """太阳高度角（度）"""
+    times = sun_times(solar_date(when, longitude), latitude, longitude)
+    utc = when.astimezone(UTC)
+    minutes = utc.hour * 60 + utc.minute + utc.second / 60
+    hour_angle = math.radians((minutes + times.equation_of_time + 4 * longitude) / 4 - 180)
+    lat = math.radians(latitude)
+    sin_term = math.sin(lat) * math.sin(times.declination)
+    cos_term = math.cos(lat) * math.cos(times.declination) * math.cos(hour_angle)
+    cos_zenith = sin_term + cos_term
+    return 90 - math.degrees(math.acos(max(-1.0, min(1.0, cos_zenith))))
+
+
+def daytime_flags(times: Iterable[datetime], latitude: float, longitude: float) -> list[bool]:
+    """一次性判断整个时间序列是否处于白天；每天只计算一次日出日落，逐项只做比较"""
+    flags = []
+    for when in times:
+        sun = sun_times(solar_date(when, longitude), latitude, longitude)
+        if sun.sunrise is None or sun.sunset is None:
+            flags.append(sun.polar_day)
+        else:
+            flags.append(sun.sunrise <= when < sun.sunset)
+    return flags
+
+
+def _solar_parameters(when: datetime) -> tuple[float, float]:
+    """太阳赤纬（弧度）与时差（分钟）"""
+    t = (when - _J2000).total_seconds() / 86400 / 36525
+    mean_longitude = math.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anomaly = math.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccentricity = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    center = math.radians(
+        math.sin(mean_anomaly) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + math.sin(2 * mean_anomaly) * (0.019993 - 0.000101 * t)
+        + math.sin(3 * mean_anomaly) * 0.000289
+    )
+    omega = math.radians(125.04 - 1934.136 * t)
+    apparent_longitude = mean_longitude + center - math.radians(0.00569 + 0.00478 * math.sin(omega))
+    obliquity = math.radians(
+        23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60 + 0.00256 * math.cos(omega)
+    )
+    declination = math.asin(math.sin(obliquity) * math.sin(apparent_longitude))
+
+    y = math.tan(obliquity / 2) ** 2
+    equation_of_time = 4 * math.degrees(
+        y * math.sin(2 * mean_longitude)
+        - 2 * eccentricity * math.sin(mean_anomaly)
+        + 4 * eccentricity * y * math.sin(mean_anomaly) * math.cos(2 * mean_longitude)
+        - 0.5 * y * y * math.sin(4 * mean_longitude)
+        - 1.25 * eccentricity * eccentricity * math.sin(2 * mean_anomaly)
+    )
+    return declination, equation_of_time
@@ -0,0 +1,106 @@
+from datetime import timedelta
+import logging
+import math
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE
+from homeassistant.core import CALLBACK_TYPE, Event, EventStateChangedData, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+
+if TYPE_CHECKING:
+    from . import Coordinators
+
+_LOGGER = logging.getLogger(__name__)
+
+# 坐标保留两位小数（约 1 公里）作为格点；GPS 抖动会在格点边界来回跳动，
+# 因此还要求离开上次查询位置足够远，且两次切换之间至少间隔一段时间
+MIN_DISTANCE_KM = 1.5
+MIN_INTERVAL = timedelta(minutes=10)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def grid_cell(latitude: float, longitude: float) -> tuple[str, str]:
+    return str(round(longitude, 2)), str(round(latitude, 2))
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """两点间的大圆距离（haversine）"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class LocationTracker:
+    """跟随 person/device_tracker 实体的位置切换查询坐标
+
+    只有离开当前格点、移动超过 MIN_DISTANCE_KM 且距上次切换超过 MIN_INTERVAL 时才切换，
+    间隔未到时推迟到间隔结束后按最新位置再判断一次。
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinators: "Coordinators", entity_id: str) -> None:
+        self.hass = hass
+        self.coordinators = coordinators
+        self.entity_id = entity_id
+        self._last_retarget: float = 0
+        self._cancel_retry: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """按实体当前位置确定初始坐标并开始跟踪，返回停止跟踪的回调"""
+        self._async_evaluate(self.hass.states.get(self.entity_id), refresh=False)
+        unsub = async_track_state_change_event(self.hass, self.entity_id, self._async_state_changed)
+
+        @callback
+        def async_stop() -> None:
+            unsub()
+            self._async_cancel_retry()
+
+        return async_stop
+
+    @callback
+    def _async_state_changed(self, event: Event[EventStateChangedData]) -> None:
+        self._async_evaluate(event.data["new_state"])
+
+    @callback
+    def _async_retry(self, _now) -> None:
+        self._cancel_retry = None
+        self._async_evaluate(self.hass.states.get(self.entity_id))
+
+    @callback
+    def _async_cancel_retry(self) -> None:
+        if self._cancel_retry is not None:
+            self._cancel_retry()
+            self._cancel_retry = None
+
+    @callback
+    def _async_evaluate(self, state: State | None, refresh: bool = True) -> None:
+        if state is None:
+            return
+        latitude = state.attributes.get(ATTR_LATITUDE)
+        longitude = state.attributes.get(ATTR_LONGITUDE)
+        if latitude is None or longitude is None:
+            return
+
+        client = self.coordinators.client
+        cell = grid_cell(latitude, longitude)
+        if cell == (client.longitude, client.latitude):
+            return
+        if distance_km(float(client.latitude), float(client.longitude), latitude, longitude) < MIN_DISTANCE_KM:
+            return
+        wait = self._last_retarget + MIN_INTERVAL.total_seconds() - time.monotonic()
+        if refresh and wait > 0:
+            if self._cancel_retry is None:
+                self._cancel_retry = async_call_later(self.hass, wait, self._async_retry)
+            return
+
+        self._async_cancel_retry()
+        self._last_retarget = time.monotonic()
+        _LOGGER.debug("%s moved to %s, retargeting", self.entity_id, cell)
+        client.retarget(*cell)
+        if refresh:
+            for coordinator in self.coordinators:
+                self.hass.async_create_task(coordinator.async_request_refresh())
@@ -0,0 +1,129 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from functools import partial
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+if TYPE_CHECKING:
+    from . import Coordinators
+
+_LOGGER = logging.getLogger(__name__)
+
+# 在容差窗口内到期的协调器合并为一个波次，一起提前刷新
+WAVE_TOLERANCE = timedelta(minutes=2)
+# 协调器自身的定时器带有不到 1 秒的随机偏移，波次提前 2 秒触发以接管刷新
+WAVE_LEAD = timedelta(seconds=2)
+
+
+class RefreshWaves:
+    """把各协调器独立的定时刷新合并为同步的波次
+
+    每个波次只唤醒一次事件循环，在同一组长连接上并发刷新所有到期（或将在容差窗口内到期）的协调器，
+    各自取到数据后等待其他协调器，再在同一轮回调中交付，实体据此只写入一次状态。刷新经由协调器的
+    async_refresh，会取消它自身的定时器并照常记录成功时间和错误状态。只有已经有监听者的协调器加入波次，
+    按需订阅的预报协调器没有订阅时不会被刷新。协调器的刷新间隔保持不变，提前刷新最多 WAVE_TOLERANCE，
+    几轮之后各协调器的相位自然对齐。
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinators: "Coordinators", tolerance: timedelta = WAVE_TOLERANCE):
+        self.hass = hass
+        self.coordinators = list(coordinators)
+        self.tolerance = tolerance
+        self._last: dict[DataUpdateCoordinator, float] = {}
+        self._barriers: dict[DataUpdateCoordinator, asyncio.Barrier] = {}
+        self._in_wave = False
+        self._cancel_timer: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """在首次刷新之后开始调度，返回停止调度的回调
+
+        不注册监听者，以免启动协调器自身的定时器，而是包装更新方法记录每次刷新的时间。
+        """
+        now = time.monotonic()
+        update_methods = {}
+        for coordinator in self.coordinators:
+            self._last[coordinator] = now
+            update_methods[coordinator] = coordinator.update_method
+            coordinator.update_method = partial(self._async_update, coordinator, coordinator.update_method)
+        self._async_schedule()
+
+        @callback
+        def async_stop() -> None:
+            for coordinator, update_method in update_methods.items():
+                coordinator.update_method = update_method
+            self._async_cancel_timer()
+
+        return async_stop
+
+    def _due(self, coordinator: DataUpdateCoordinator) -> float | None:
+        # 没有监听者的协调器不会轮询（如没有订阅的逐小时预报），只在有订阅时加入波次
+        if coordinator.update_interval is None or not coordinator._listeners:  # noqa: SLF001
+            return None
+        return self._last[coordinator] + coordinator.update_interval.total_seconds()
+
+    async def _async_update(self, coordinator: DataUpdateCoordinator, update_method: Callable[[], Awaitable]) -> Any:
+        """记录协调器的每次刷新，波次中的刷新取到数据（或出错）后等待其他协调器，再交付给监听者"""
+        # 只有波次发起的刷新经过屏障，同时发起的其他刷新照常交付
+        barrier = self._barriers.pop(coordinator, None)
+        try:
+            return await update_method()
+        finally:
+            self._last[coordinator] = time.monotonic()
+            if barrier is not None:
+                await barrier.wait()
+            elif not self._in_wave:
+                # 协调器也可能因按需刷新或自身定时器而更新，此时按新的到期时间重新调度
+                self._async_schedule()
+
+    @callback
+    def _async_cancel_timer(self) -> None:
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
+
+    @callback
+    def _async_schedule(self) -> None:
+        self._async_cancel_timer()
+        due = [due for coordinator in self.coordinators if (due := self._due(coordinator)) is not None]
+        if due:
+            delay = min(due) - time.monotonic() - WAVE_LEAD.total_seconds()
+            self._cancel_timer = async_call_later(self.hass, max(delay, 0), self._async_wave)
+
+    async def _async_wave(self, _now: datetime) -> None:
+        self._cancel_timer = None
+        horizon = time.monotonic() + (WAVE_LEAD + self.tolerance).total_seconds()
+        wave = [
+            coordinator
+            for coordinator in self.coordinators
+            if (due := self._due(coordinator)) is not None and due <= horizon
+        ]
+        if wave:
+            _LOGGER.debug("Refresh wave: %s", [coordinator.name for coordinator in wave])
+            barrier = asyncio.Barrier(len(wave))
+            self._barriers.update(dict.fromkeys(wave, barrier))
+            self._in_wave = True
+            try:
+                await asyncio.gather(*(self._async_refresh(coordinator, barrier) for coordinator in wave))
+            finally:
+                self._in_wave = False
+            # 协调器已关闭时没有调用更新方法，同样按本次波次计算下一次到期时间，避免立即重试
+            now = time.monotonic()
+            for coordinator in wave:
+                self._last[coordinator] = now
+        self._async_schedule()
+
+    async def _async_refresh(self, coordinator: DataUpdateCoordinator, barrier: asyncio.Barrier) -> None:
+        # 经由 async_refresh 刷新：取消协调器自身的定时器，照常记录成功时间和错误状态并安排下一次刷新
+        try:
+            await coordinator.async_refresh()
+        finally:
+            # 没有调用更新方法时也要到达屏障，避免其他协调器一直等待
+            if self._barriers.pop(coordinator, None) is not None:
+                await barrier.wait()
@@ -1,4 +1,8 @@
+import asyncio
+from datetime import date, datetime
+from functools import lru_cache
 import logging
+import sys
 
 from homeassistant.components.weather import (
     ATTR_CONDITION_CLEAR_NIGHT,
@@ -21,10 +25,12 @@ from homeassistant.const import CONF_NAME, UnitOfLength, UnitOfPressure, UnitOfS
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import TimestampDataUpdateCoordinator
 import homeassistant.util.dt as dt_util
 
 from . import Coordinators, QWeatherConfigEntry
 from .const import ATTRIBUTION, DOMAIN, MANUFACTURER, AirQualityNow, DailyForecast, HourlyForecast, RealtimeWeather
+from .solar import daytime_flags, sun_times
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -53,7 +59,11 @@ class QWeatherEntity(CoordinatorWeatherEntity):
     _attr_attribution: str | None = ATTRIBUTION
     _attr_has_entity_name: bool = True
     _attr_name: str | None = None
-    _attr_supported_features: int | None = WeatherEntityFeature.FORECAST_DAILY | WeatherEntityFeature.FORECAST_HOURLY
+    _attr_supported_features: int | None = (
+        WeatherEntityFeature.FORECAST_DAILY
+        | WeatherEntityFeature.FORECAST_HOURLY
+        | WeatherEntityFeature.FORECAST_TWICE_DAILY
+    )
 
     _attr_precision: float = 1
     _attr_native_pressure_unit: str | None = UnitOfPressure.HPA
@@ -68,8 +78,10 @@ class QWeatherEntity(CoordinatorWeatherEntity):
             coordinators.observation,
             daily_coordinator=coordinators.daily_forecast,
             hourly_coordinator=coordinators.hourly_forecast,
+            twice_daily_coordinator=coordinators.daily_forecast,
         )
         self.coordinators = coordinators
+        self._pending_write: asyncio.Handle | None = None
         self._attr_unique_id = f"{unique_id}_weather"
         self._attr_device_info = DeviceInfo(
             entry_type=DeviceEntryType.SERVICE,
@@ -80,29 +92,58 @@ class QWeatherEntity(CoordinatorWeatherEntity):
 
         self._forecast_daily: list[Forecast] | None = None
         self._forecast_hourly: list[Forecast] | None = None
+        self._forecast_twice_daily: list[Forecast] | None = None
 
         self._update_weather_now(coordinators.observation.data)
-        self._update_weather_daily(coordinators.daily_forecast.data)
-        self._update_weather_hourly(coordinators.hourly_forecast.data)
+        self._update_weather_daily(coordinators.daily_forecast)
+        self._update_weather_hourly(coordinators.hourly_forecast)
 
         self._update_air_now(coordinators.air_now.data)
 
+    @property
+    def latitude(self) -> float:
+        """当前查询位置的纬度，跟随移动设备时会变化"""
+        return round(float(self.coordinators.client.latitude), 2)
+
+    @property
+    def longitude(self) -> float:
+        return round(float(self.coordinators.client.longitude), 2)
+
     async def async_added_to_hass(self) -> None:
         """When entity is added to hass."""
         await super().async_added_to_hass()
         self.async_on_remove(self.coordinators.air_now.async_add_listener(self._handle_air_now_coordinator_update))
+        self.async_on_remove(self._async_cancel_pending_write)
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         _LOGGER.debug("_handle_coordinator_update")
         self._update_weather_now(self.coordinators.observation.data)
-        super()._handle_coordinator_update()
+        self._async_write_ha_state_soon()
+
+    @callback
+    def _async_write_ha_state_soon(self) -> None:
+        """同一轮回调中多个协调器的更新（如刷新波次）合并为一次状态写入"""
+        if self._pending_write is None:
+            self._pending_write = self.hass.loop.call_soon(self._async_write_pending_state)
+
+    @callback
+    def _async_write_pending_state(self) -> None:
+        self._pending_write = None
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_pending_write(self) -> None:
+        if self._pending_write is not None:
+            self._pending_write.cancel()
+            self._pending_write = None
 
     def _update_weather_now(self, weather_now: RealtimeWeather | None):
         if not weather_now:
             return
-        self._attr_condition = CONDITION_MAP.get(weather_now.get("icon"))
+        (is_daytime,) = daytime_flags([dt_util.utcnow()], self.latitude, self.longitude)
+        self._attr_condition = night_aware_condition(weather_now.get("icon"), is_daytime)
         self._attr_humidity = maybe_float(weather_now.get("humidity"))
         self._attr_cloud_coverage = maybe_int(weather_now.get("cloud"))
         self._attr_wind_bearing = maybe_float(weather_now.get("wind360"))
@@ -120,32 +161,24 @@ class QWeatherEntity(CoordinatorWeatherEntity):
     def _handle_daily_forecast_coordinator_update(self) -> None:
         """Handle updated data from the daily forecast coordinator."""
         _LOGGER.debug("_handle_daily_forecast_coordinator_update")
-        self._update_weather_daily(self.coordinators.daily_forecast.data)
-        self.async_write_ha_state()
-
-    def _update_weather_daily(self, weather_daily: list[DailyForecast]) -> None:
-        self._forecast_daily = [
-            Forecast(
-                condition=CONDITION_MAP.get(daily.get("iconDay")),
-                datetime=daily.get("fxDate"),
-                humidity=maybe_float(daily.get("humidity")),
-                # precipitation_probability=,
-                cloud_coverage=maybe_int(daily.get("cloud")),
-                native_precipitation=maybe_float(daily.get("precip")),
-                native_pressure=maybe_float(daily.get("pressure")),
-                native_temperature=maybe_float(daily.get("tempMax")),
-                native_templow=maybe_float(daily.get("tempMin")),
-                # native_apparent_temperature=,
-                wind_bearing=maybe_float(daily.get("wind360Day")),
-                # native_wind_gust_speed=,
-                native_wind_speed=maybe_float(daily.get("windSpeedDay")),
-                # native_dew_point=,
-                uv_index=maybe_float(daily.get("uvIndex")),
-                # is_daytime=,
-            )
-            for daily in weather_daily
-        ]
+        self._update_weather_daily(self.coordinators.daily_forecast)
+        self._async_write_ha_state_soon()
 
+    @callback
+    def _handle_twice_daily_forecast_coordinator_update(self) -> None:
+        """Handle updated data from the twice daily forecast coordinator."""
+        _LOGGER.debug("_handle_twice_daily_forecast_coordinator_update")
+        self._update_weather_daily(self.coordinators.daily_forecast)
+        self._async_write_ha_state_soon()
+
+    def _update_weather_daily(self, coordinator: TimestampDataUpdateCoordinator[list[DailyForecast]]) -> None:
+        # 预报只有本实体使用，转换后释放原始数据。每日预报和白天/夜间预报共用同一个协调器，
+        # 只订阅其中一种时也只有一个处理函数被调用，因此每次都同时转换两者
+        weather_daily, coordinator.data = coordinator.data, None
+        if weather_daily is None:
+            return
+        self._forecast_daily = daily_forecast(weather_daily)
+        self._forecast_twice_daily = twice_daily_forecast(weather_daily, self.latitude, self.longitude)
         if weather_daily:
             self._attr_uv_index = maybe_float(weather_daily[0].get("uvIndex"))
 
@@ -153,31 +186,14 @@ class QWeatherEntity(CoordinatorWeatherEntity):
     def _handle_hourly_forecast_coordinator_update(self) -> None:
         """Handle updated data from the hourly forecast coordinator."""
         _LOGGER.debug("_handle_hourly_forecast_coordinator_update")
-        self._update_weather_hourly(self.coordinators.hourly_forecast.data)
-        self.async_write_ha_state()
+        self._update_weather_hourly(self.coordinators.hourly_forecast)
+        self._async_write_ha_state_soon()
 
-    def _update_weather_hourly(self, weather_hourly: list[HourlyForecast]):
-        self._forecast_hourly = [
-            Forecast(
-                condition=CONDITION_MAP.get(hourly.get("icon")),
-                datetime=hourly.get("fxTime"),
-                humidity=maybe_float(hourly.get("humidity")),
-                precipitation_probability=maybe_int(hourly.get("pop")),
-                cloud_coverage=maybe_int(hourly.get("cloud")),
-                native_precipitation=maybe_float(hourly.get("precip")),
-                native_pressure=maybe_float(hourly.get("pressure")),
-                native_temperature=maybe_float(hourly.get("temp")),
-                # native_templow=,
-                # native_apparent_temperature=,
-                wind_bearing=maybe_float(hourly.get("wind360")),
-                # native_wind_gust_speed=,
-                native_wind_speed=maybe_float(hourly.get("windSpeed")),
-                native_dew_point=maybe_float(hourly.get("dew")),
-                # uv_index=,
-                # is_daytime=,
-            )
-            for hourly in weather_hourly
-        ]
+    def _update_weather_hourly(self, coordinator: TimestampDataUpdateCoordinator[list[HourlyForecast]]) -> None:
+        weather_hourly, coordinator.data = coordinator.data, None
+        if weather_hourly is None:
+            return
+        self._forecast_hourly = hourly_forecast(weather_hourly, self.latitude, self.longitude)
 
     @callback
     def _async_forecast_daily(self) -> list[Forecast] | None:
@@ -189,12 +205,17 @@ class QWeatherEntity(CoordinatorWeatherEntity):
         """Return the hourly forecast in native units."""
         return self._forecast_hourly
 
+    @callback
+    def _async_forecast_twice_daily(self) -> list[Forecast] | None:
+        """Return the twice daily forecast in native units."""
+        return self._forecast_twice_daily
+
     @callback
     def _handle_air_now_coordinator_update(self) -> None:
         """Handle updated data from the air now coordinator."""
         _LOGGER.debug("_handle_air_now_coordinator_update")
         self._update_air_now(self.coordinators.air_now.data)
-        self.async_write_ha_state()
+        self._async_write_ha_state_soon()
 
     @callback
     def _update_air_now(self, air_now: AirQualityNow | None) -> None:
@@ -211,10 +232,106 @@ class QWeatherEntity(CoordinatorWeatherEntity):
             return
         self._attr_extra_state_attributes = {
             # "obs_time": weather_now.get("obsTime"),
-            "winddir": weather_now.get("windDir"),
+            "winddir": maybe_intern(weather_now.get("windDir")),
         }
 
 
+def daily_forecast(weather_daily: list[DailyForecast]) -> list[Forecast]:
+    return [
+        Forecast(
+            condition=CONDITION_MAP.get(daily.get("iconDay")),
+            datetime=sys.intern(daily["fxDate"]),
+            humidity=maybe_float(daily.get("humidity")),
+            # precipitation_probability=,
+            cloud_coverage=maybe_int(daily.get("cloud")),
+            native_precipitation=maybe_float(daily.get("precip")),
+            native_pressure=maybe_float(daily.get("pressure")),
+            native_temperature=maybe_float(daily.get("tempMax")),
+            native_templow=maybe_float(daily.get("tempMin")),
+            # native_apparent_temperature=,
+            wind_bearing=maybe_float(daily.get("wind360Day")),
+            # native_wind_gust_speed=,
+            native_wind_speed=maybe_float(daily.get("windSpeedDay")),
+            # native_dew_point=,
+            uv_index=maybe_float(daily.get("uvIndex")),
+            # is_daytime=,
+        )
+        for daily in weather_daily
+    ]
+
+
+def twice_daily_forecast(weather_daily: list[DailyForecast], latitude: float, longitude: float) -> list[Forecast]:
+    """白天和夜间分开的预报，时间取本地计算的日出、日落"""
+    forecast = []
+    for daily in weather_daily:
+        sun = sun_times(date.fromisoformat(daily["fxDate"]), latitude, longitude)
+        forecast.append(
+            Forecast(
+                condition=night_aware_condition(daily.get("iconDay"), True),
+                datetime=sun.sunrise.isoformat() if sun.sunrise else sys.intern(daily["fxDate"]),
+                is_daytime=True,
+                humidity=maybe_float(daily.get("humidity")),
+                cloud_coverage=maybe_int(daily.get("cloud")),
+                native_precipitation=maybe_float(daily.get("precip")),
+                native_pressure=maybe_float(daily.get("pressure")),
+                native_temperature=maybe_float(daily.get("tempMax")),
+                native_templow=maybe_float(daily.get("tempMin")),
+                wind_bearing=maybe_float(daily.get("wind360Day")),
+                native_wind_speed=maybe_float(daily.get("windSpeedDay")),
+                uv_index=maybe_float(daily.get("uvIndex")),
+            )
+        )
+        forecast.append(
+            Forecast(
+                condition=night_aware_condition(daily.get("iconNight"), False),
+                datetime=sun.sunset.isoformat() if sun.sunset else sys.intern(daily["fxDate"]),
+                is_daytime=False,
+                humidity=maybe_float(daily.get("humidity")),
+                cloud_coverage=maybe_int(daily.get("cloud")),
+                native_precipitation=maybe_float(daily.get("precip")),
+                native_pressure=maybe_float(daily.get("pressure")),
+                native_temperature=maybe_float(daily.get("tempMin")),
+                native_templow=maybe_float(daily.get("tempMin")),
+                wind_bearing=maybe_float(daily.get("wind360Night")),
+                native_wind_speed=maybe_float(daily.get("windSpeedNight")),
+            )
+        )
+    return forecast
+
+
+def hourly_forecast(weather_hourly: list[HourlyForecast], latitude: float, longitude: float) -> list[Forecast]:
+    times = [datetime.fromisoformat(hourly["fxTime"]) for hourly in weather_hourly]
+    return [
+        Forecast(
+            condition=night_aware_condition(hourly.get("icon"), is_daytime),
+            datetime=sys.intern(hourly["fxTime"]),
+            humidity=maybe_float(hourly.get("humidity")),
+            precipitation_probability=maybe_int(hourly.get("pop")),
+            cloud_coverage=maybe_int(hourly.get("cloud")),
+            native_precipitation=maybe_float(hourly.get("precip")),
+            native_pressure=maybe_float(hourly.get("pressure")),
+            native_temperature=maybe_float(hourly.get("temp")),
+            # native_templow=,
+            # native_apparent_temperature=,
+            wind_bearing=maybe_float(hourly.get("wind360")),
+            # native_wind_gust_speed=,
+            native_wind_speed=maybe_float(hourly.get("windSpeed")),
+            native_dew_point=maybe_float(hourly.get("dew")),
+            # uv_index=,
+            is_daytime=is_daytime,
+        )
+        for hourly, is_daytime in zip(weather_hourly, daytime_flags(times, latitude, longitude), strict=True)
+    ]
+
+
+def night_aware_condition(icon: str | None, is_daytime: bool) -> str | None:
+    """白天图标出现在夜间时，晴天改为晴夜"""
+    condition = CONDITION_MAP.get(icon)
+    if condition == ATTR_CONDITION_SUNNY and not is_daytime:
+        return ATTR_CONDITION_CLEAR_NIGHT
+    return condition
+
+
 # https://www.home-assistant.io/integrations/weather/
 # https://dev.qweather.com/docs/resource/icons/
 CONDITION_MAP = {
@@ -286,12 +403,19 @@ CONDITION_MAP = {
 # region Utils
 
 
+# 各位置、各时段的数值大量重复，缓存解析结果使相同的值共用同一个对象
+@lru_cache(maxsize=1024)
 def maybe_int(s: str | None) -> int | None:
     return None if s is None else int(s)
 
 
+@lru_cache(maxsize=1024)
 def maybe_float(s: str | None) -> float | None:
     return None if s is None else float(s)
 
 
+def maybe_intern(s: str | None) -> str | None:
+    return None if s is None else sys.intern(s)
+
+
 # endregion
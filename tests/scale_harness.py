@@ -0,0 +1,364 @@
+"""Scale benchmark: N locations refreshed in one event loop against a local stand-in server.
+
+Run with ``python -m tests.scale_harness --locations 10 100 1000`` and keep the JSON output to track regressions.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import contextlib
+from datetime import date, datetime, timedelta
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+
+from aiohttp import ClientSession, web
+
+from custom_components.qweather import Coordinators, binary_sensor, sensor, weather
+from custom_components.qweather.api import QWeatherClient
+from custom_components.qweather.session import RequestTimings, create_session
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, CONF_NAME
+from homeassistant.core import HomeAssistant
+
+WARNING_TEXT = "北京市气象台发布大风蓝色预警：预计明天傍晚以前本市大部地区将出现6级阵风7-8级的大风，请注意防范对高空作业、交通出行、设施农业等的不利影响。"
+
+
+def _daily(days: int) -> list[dict[str, str]]:
+    today = date.today()
+    return [
+        {
+            "fxDate": (today + timedelta(days=day)).isoformat(),
+            "sunrise": "06:30",
+            "sunset": "17:30",
+            "tempMax": "22",
+            "tempMin": "12",
+            "iconDay": "101",
+            "textDay": "多云",
+            "iconNight": "150",
+            "textNight": "晴",
+            "wind360Day": "45",
+            "windDirDay": "东北风",
+            "windScaleDay": "1-2",
+            "windSpeedDay": "3",
+            "wind360Night": "0",
+            "windDirNight": "北风",
+            "windScaleNight": "1-2",
+            "windSpeedNight": "3",
+            "humidity": "65",
+            "precip": "0.0",
+            "pressure": "1020",
+            "vis": "25",
+            "cloud": "4",
+            "uvIndex": "3",
+        }
+        for day in range(days)
+    ]
+
+
+def _hourly() -> list[dict[str, str]]:
+    now = datetime.now().astimezone().replace(minute=0, second=0, microsecond=0)
+    return [
+        {
+            "fxTime": (now + timedelta(hours=hour)).isoformat(timespec="minutes"),
+            "temp": "18",
+            "icon": "100",
+            "text": "晴",
+            "wind360": "335",
+            "windDir": "西北风",
+            "windScale": "3-4",
+            "windSpeed": "20",
+            "humidity": "40",
+            "pop": "0",
+            "precip": "0.0",
+            "pressure": "1025",
+            "cloud": "0",
+            "dew": "5",
+        }
+        for hour in range(24)
+    ]
+
+
+class StandInServer:
+    """在独立线程的事件循环中运行的和风天气 API 替身，避免服务端开销计入被测循环"""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.requests = 0
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._runner: web.AppRunner | None = None
+        self._routes: list[tuple[str, Callable[[web.Request], Any]]] = [
+            ("/geo/v2/city/lookup", lambda _: {"code": "200", "location": [{"id": "101010100"}]}),
+            ("/warning/list", lambda _: {"code": "200", "warningLocList": [{"locationId": "101010100"}]}),
+            ("/warning/now", lambda _: {"code": "200", "warning": [self._warning()]}),
+            ("/indices/1d", self._indices),
+            ("/minutely/5m", lambda _: {"code": "200", "summary": "未来两小时无降水", "minutely": []}),
+            ("/now", lambda _: {"code": "200", "now": self._now()}),
+            ("/24h", lambda _: {"code": "200", "hourly": _hourly()}),
+            ("d", lambda request: {"code": "200", "daily": _daily(int(request.path.rsplit("/", 1)[1][:-1]))}),
+        ]
+
+    def start(self) -> None:
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._setup())
+        self._started.set()
+        self._loop.run_forever()
+
+    async def _setup(self) -> None:
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if request.path.startswith("/airquality/v1/current/"):
+            return web.json_response(self._air())
+        for suffix, payload in self._routes:
+            if request.path.endswith(suffix):
+                return web.json_response(payload(request))
+        return web.json_response({"code": "404"}, status=404)
+
+    @staticmethod
+    def _now() -> dict[str, str]:
+        return {
+            "obsTime": datetime.now().astimezone().isoformat(timespec="minutes"),
+            "temp": "18",
+            "feelsLike": "17",
+            "icon": "101",
+            "text": "多云",
+            "wind360": "123",
+            "windDir": "东南风",
+            "windScale": "1",
+            "windSpeed": "3",
+            "humidity": "72",
+            "precip": "0.0",
+            "pressure": "1003",
+            "vis": "16",
+            "cloud": "10",
+            "dew": "12",
+        }
+
+    @staticmethod
+    def _warning() -> dict[str, str]:
+        return {
+            "id": "10101010020230403103000500681616",
+            "sender": "北京市气象台",
+            "pubTime": "2023-04-03T10:30+08:00",
+            "title": "北京市气象台发布大风蓝色预警[Ⅳ级/一般]",
+            "status": "active",
+            "severity": "Minor",
+            "severityColor": "Blue",
+            "type": "1006",
+            "typeName": "大风",
+            "text": WARNING_TEXT,
+        }
+
+    @staticmethod
+    def _indices(request: web.Request) -> dict[str, Any]:
+        types = request.query.get("type", "1").split(",")
+        today = date.today().isoformat()
+        return {
+            "code": "200",
+            "daily": [
+                {"date": today, "type": t, "name": "指数", "level": "1", "category": "适宜", "text": "天气较好。"}
+                for t in types
+            ],
+        }
+
+    @staticmethod
+    def _air() -> dict[str, Any]:
+        return {
+            "indexes": [],
+            "pollutants": [
+                {
+                    "code": "o3",
+                    "name": "O3",
+                    "fullName": "臭氧",
+                    "concentration": {"value": 60.0, "unit": "μg/m3"},
+                    "subIndex": {"code": "qaqi", "aqi": 1.0, "aqiDisplay": "1.0"},
+                }
+            ],
+            "stations": [],
+        }
+
+
+class LoopLagMonitor:
+    """周期性休眠，以实际唤醒时间与预期的差值作为事件循环延迟"""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def percentiles(self) -> dict[str, float]:
+        if len(self.samples) < 2:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        cuts = statistics.quantiles(self.samples, n=100)
+        return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+class Location:
+    """一个位置：客户端、协调器以及各平台创建的实体"""
+
+    def __init__(self, hass: HomeAssistant, session: ClientSession, port: int, index: int) -> None:
+        latitude = round(18 + (index * 0.37) % 35, 2)
+        longitude = round(100 + (index * 0.53) % 30, 2)
+        client = QWeatherClient(session, f"127.0.0.1:{port}", "key", str(longitude), str(latitude), True)
+        client.scheme = "http"
+        self.coordinators = Coordinators(hass, None, client)
+        self.entry = SimpleNamespace(
+            runtime_data=self.coordinators,
+            data={CONF_NAME: f"location {index}", CONF_LATITUDE: latitude, CONF_LONGITUDE: longitude},
+            options={},
+            unique_id=f"location_{index}",
+        )
+        self.entities: list[Any] = []
+
+    async def async_setup(self, hass: HomeAssistant) -> None:
+        await self.async_refresh()
+        for module in (binary_sensor, sensor, weather):
+            entities: list = []
+            await module.async_setup_entry(hass, self.entry, entities.extend)
+            # 不经过实体平台添加，只提供计算状态时用到的翻译信息（较新的 HA 版本从 platform_data 读取）
+            platform = SimpleNamespace(
+                platform_name="qweather",
+                domain=module.__name__.rpartition(".")[2],
+                platform_translations={},
+                default_language_platform_translations={},
+            )
+            for entity in entities:
+                entity.hass = hass
+                entity.platform = entity.platform_data = platform
+            self.entities.extend(entities)
+
+    async def async_refresh(self) -> None:
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in self.coordinators))
+
+    def update_entities(self) -> None:
+        """与协调器回调相同的实体更新路径，并计算状态与属性（不写入状态机）"""
+        coordinators = self.coordinators
+        for entity in self.entities:
+            if isinstance(entity, weather.QWeatherEntity):
+                entity._update_weather_now(coordinators.observation.data)  # noqa: SLF001
+                entity._update_weather_daily(coordinators.daily_forecast)  # noqa: SLF001
+                entity._update_weather_hourly(coordinators.hourly_forecast)  # noqa: SLF001
+                entity._update_air_now(coordinators.air_now.data)  # noqa: SLF001
+            else:
+                entity._async_update_attrs(entity.coordinator.data)  # noqa: SLF001
+            _ = (entity.state, entity.state_attributes, entity.extra_state_attributes)
+
+    @property
+    def attribute_bytes(self) -> int:
+        """状态属性序列化后的大小，近似每次状态写入的负载"""
+        return sum(
+            len(json.dumps(entity.state_attributes or {}, ensure_ascii=False, default=str).encode())
+            + len(json.dumps(entity.extra_state_attributes or {}, ensure_ascii=False, default=str).encode())
+            for entity in self.entities
+        )
+
+    @property
+    def failed(self) -> int:
+        return sum(not coordinator.last_update_success for coordinator in self.coordinators)
+
+
+async def run(locations: int, cycles: int = 3, latency: float = 0.02) -> dict[str, Any]:
+    server = StandInServer(latency)
+    server.start()
+    hass = HomeAssistant(tempfile.mkdtemp())
+    timings = RequestTimings()
+    session = create_session(timings, limit_per_host=min(locations, 100))
+    tracemalloc.start()
+    try:
+        sites = [Location(hass, session, server.port, index) for index in range(locations)]
+        await asyncio.gather(*(site.async_setup(hass) for site in sites))
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        requests_before = server.requests
+        wall_start = time.perf_counter()
+        cpu_times = []
+        for _ in range(cycles):
+            cpu_start = time.thread_time()
+            await asyncio.gather(*(site.async_refresh() for site in sites))
+            for site in sites:
+                site.update_entities()
+            cpu_times.append(time.thread_time() - cpu_start)
+        wall = time.perf_counter() - wall_start
+        await monitor.stop()
+
+        memory, peak = tracemalloc.get_traced_memory()
+        requests = server.requests - requests_before
+        return {
+            "locations": locations,
+            "cycles": cycles,
+            "requests": requests,
+            "failed_coordinators": sum(site.failed for site in sites),
+            "requests_per_second": requests / wall,
+            "cycle_seconds": wall / cycles,
+            "cpu_seconds_per_cycle": statistics.mean(cpu_times),
+            "loop_lag": monitor.percentiles(),
+            "memory_per_location": memory / locations,
+            "attribute_bytes_per_location": sum(site.attribute_bytes for site in sites) / locations,
+            "peak_memory": peak,
+            "new_connections": timings.new_connections,
+            "reused_connections": timings.reused_connections,
+        }
+    finally:
+        tracemalloc.stop()
+        await session.close()
+        await hass.async_stop(force=True)
+        server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--locations", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in server latency in seconds")
+    args = parser.parse_args()
+    for locations in args.locations:
+        result = asyncio.run(run(locations, args.cycles, args.latency))
+        sys.stdout.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
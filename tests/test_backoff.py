@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather import async_load_backoff, async_save_backoff
+from custom_components.qweather.api import QWeatherClient
+
+
+class FakeStore:
+    def __init__(self, data: dict | None = None) -> None:
+        self.data = data
+        self.saved: list[dict] = []
+
+    async def async_load(self) -> dict | None:
+        return self.data
+
+    def async_delay_save(self, data_func, delay: float = 0) -> None:
+        self.saved.append(data_func())
+
+
+class FakeResponse:
+    def __init__(self, status: int) -> None:
+        self.status = status
+
+    async def json(self) -> dict:
+        return {"error": {"detail": "error", "type": "error"}}
+
+
+class BackoffTests(unittest.TestCase):
+    def client(self, store: FakeStore, wait_until: float = 0) -> QWeatherClient:
+        client = QWeatherClient(
+            None,
+            "api.qweather.com",
+            "key",
+            "116.41",
+            "39.92",
+            True,
+            wait_until=wait_until,
+            on_backoff=lambda until: async_save_backoff(store, until),
+        )
+        self.requests: list[str] = []
+        self.status = HTTPStatus.OK
+
+        async def get(path, params):
+            self.requests.append(path)
+            return FakeResponse(self.status)
+
+        client._get = get  # noqa: SLF001
+        return client
+
+    def test_unexpired_backoff_restored(self):
+        wait_until = datetime.now().timestamp() + 3600
+        store = FakeStore({"wait_until": wait_until})
+        restored = asyncio.run(async_load_backoff(store))
+        assert restored == wait_until
+
+        client = self.client(store, restored)
+        assert asyncio.run(client.api_get_v7("grid-weather/now")) is None
+        assert self.requests == []
+
+    def test_expired_backoff_ignored(self):
+        assert asyncio.run(async_load_backoff(FakeStore({"wait_until": datetime.now().timestamp() - 1}))) == 0
+        assert asyncio.run(async_load_backoff(FakeStore())) == 0
+
+    def test_only_temporary_backoff_saved(self):
+        store = FakeStore()
+        client = self.client(store)
+        for status in (HTTPStatus.PAYMENT_REQUIRED, HTTPStatus.TOO_MANY_REQUESTS):
+            client.wait_until = 0
+            self.status = status
+            asyncio.run(client.api_get_v7("grid-weather/now"))
+            assert store.saved[-1] == {"wait_until": client.wait_until}
+        assert len(store.saved) == 2
+
+        # 认证失败需要用户修正配置，不保存，重载后即可恢复请求
+        client.wait_until = 0
+        self.status = HTTPStatus.UNAUTHORIZED
+        asyncio.run(client.api_get_v7("grid-weather/now"))
+        assert client.wait_until == float("inf")
+        assert len(store.saved) == 2
+
+
+if __name__ == "__main__":
+    unittest.main()
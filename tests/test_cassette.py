@@ -0,0 +1,62 @@
+import asyncio
+from pathlib import Path
+import tempfile
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import QWeatherClient
+from custom_components.qweather.cassette import Cassette, CassetteMiss
+
+
+class FakeResponse:
+    status = 200
+    headers = {"Content-Type": "application/json", "X-Request-Id": "1"}
+
+    def __init__(self, body: str) -> None:
+        self.body = body
+
+    async def read(self) -> bytes:
+        return self.body.encode()
+
+
+class CassetteTests(unittest.TestCase):
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp()) / "cassette.jsonl"
+
+    def test_record_then_replay(self):
+        url = "https://api.qweather.com/v7/weather/now"
+        params = {"location": "116.41,39.92", "key": "secret"}
+
+        async def record():
+            cassette = Cassette(self.path, "record")
+            await cassette.record(url, params, FakeResponse('{"code":"200","now":{"temp":"1"}}'), 0.2)
+            await cassette.record(url, params, FakeResponse('{"code":"200","now":{"temp":"2"}}'), 0.2)
+
+        asyncio.run(record())
+        assert "secret" not in self.path.read_text(encoding="utf-8")
+        assert "X-Request-Id" not in self.path.read_text(encoding="utf-8")
+
+        async def replay():
+            cassette = Cassette.load(self.path, time_scale=0)
+            return [(await (await cassette.play(url, {"location": "116.41,39.92"})).json())["now"] for _ in range(3)]
+
+        assert asyncio.run(replay()) == [{"temp": "1"}, {"temp": "2"}, {"temp": "1"}]
+
+    def test_replay_miss(self):
+        self.path.write_text("", encoding="utf-8")
+        cassette = Cassette.load(self.path, time_scale=0)
+        with pytest.raises(CassetteMiss):
+            asyncio.run(cassette.play("https://api.qweather.com/v7/weather/now", {}))
+
+    def test_client_replay_miss_returns_none(self):
+        self.path.write_text("", encoding="utf-8")
+        cassette = Cassette.load(self.path, time_scale=0)
+        client = QWeatherClient(None, "api.qweather.com", "key", "116.41", "39.92", True, cassette=cassette)
+        assert asyncio.run(client.update_observation()) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import DAILY_LONG_RANGE_INTERVAL, DAILY_SHORT_RANGE, QWeatherClient
+
+
+def daily(fx_date: str, temp_max: str = "20") -> dict[str, str]:
+    return {"fxDate": fx_date, "tempMax": temp_max, "tempMin": "10", "iconDay": "100", "iconNight": "150"}
+
+
+LONG_RANGE = [daily(f"2026-10-{day}") for day in range(19, 26)]
+
+
+class DailyForecastTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1_800_000_000.0
+        self.client = QWeatherClient(None, "api.qweather.com", "key", "116.41", "39.92", True)
+        self.responses: dict[str, dict | None] = {
+            "grid-weather/7d": {"code": "200", "daily": LONG_RANGE},
+            f"grid-weather/{DAILY_SHORT_RANGE}d": {"code": "200", "daily": []},
+        }
+        self.calls: list[str] = []
+
+        async def api_get_v7(api, extra_params=None):
+            self.calls.append(api)
+            return self.responses[api]
+
+        self.client.api_get_v7 = api_get_v7
+        patcher = patch("custom_components.qweather.api.datetime")
+        mock_datetime = patcher.start()
+        mock_datetime.now.return_value.timestamp.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+
+    def short_range(self, *days: dict[str, str]) -> None:
+        self.responses[f"grid-weather/{DAILY_SHORT_RANGE}d"] = {"code": "200", "daily": list(days)}
+
+    def update(self) -> list[dict[str, str]]:
+        return asyncio.run(self.client.update_daily_forecast())
+
+    def test_short_range_merged_over_long_range(self):
+        assert [day["fxDate"] for day in self.update()] == [day["fxDate"] for day in LONG_RANGE]
+
+        self.short_range(*(daily(f"2026-10-{day}", temp_max="25") for day in (19, 20, 21)))
+        forecast = self.update()
+        assert self.calls == ["grid-weather/7d", "grid-weather/3d"]
+        assert [day["fxDate"] for day in forecast] == [day["fxDate"] for day in LONG_RANGE]
+        # 近期的数据优先，之后的日期来自缓存的远期预报
+        assert [day["tempMax"] for day in forecast] == ["25"] * 3 + ["20"] * 4
+
+    def test_days_before_short_range_dropped(self):
+        self.update()
+        # 远期预报取到之后跨过了一天，缓存中的昨天不再返回
+        self.short_range(*(daily(f"2026-10-{day}", temp_max="25") for day in (20, 21, 22)))
+        forecast = self.update()
+        assert [day["fxDate"] for day in forecast] == [f"2026-10-{day}" for day in range(20, 26)]
+        assert forecast[0]["tempMax"] == "25"
+
+    def test_failed_short_range_falls_back_to_cache(self):
+        self.update()
+        self.responses[f"grid-weather/{DAILY_SHORT_RANGE}d"] = None
+        assert self.update() == self.client._daily_long  # noqa: SLF001
+        assert self.calls == ["grid-weather/7d", "grid-weather/3d"]
+
+        self.now += DAILY_LONG_RANGE_INTERVAL.total_seconds()
+        self.update()
+        assert self.calls == ["grid-weather/7d", "grid-weather/3d", "grid-weather/7d"]
+
+
+if __name__ == "__main__":
+    unittest.main()
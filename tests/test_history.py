@@ -0,0 +1,54 @@
+from datetime import UTC, date, datetime
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+if not hasattr(pytest.importorskip("homeassistant.components.recorder.models"), "StatisticMeanType"):
+    pytest.skip("long-term statistics mean_type requires a newer Home Assistant", allow_module_level=True)
+
+from custom_components.qweather.history import LastStatistic, contiguous, missing_days, statistic_rows
+import homeassistant.util.dt as dt_util
+
+
+def history_day(day: str, precip: str = "0.5") -> list[dict[str, str]]:
+    return [
+        {"time": f"{day}T{hour:02d}:00+08:00", "temp": "20", "humidity": "60", "precip": precip} for hour in range(24)
+    ]
+
+
+class HistoryBackfillTests(unittest.TestCase):
+    def setUp(self):
+        dt_util.set_default_time_zone(dt_util.get_time_zone("Asia/Shanghai"))
+
+    def tearDown(self):
+        dt_util.set_default_time_zone(UTC)
+
+    def test_missing_days(self):
+        today = date(2026, 10, 19)
+        assert len(missing_days(0, today)) == 10
+        assert missing_days(0, today)[-1] == date(2026, 10, 18)
+        # 最后一条统计是 10 月 16 日 23 时，从 17 日开始补
+        last = datetime(2026, 10, 16, 15, tzinfo=UTC).timestamp()
+        assert missing_days(last, today) == [date(2026, 10, 17), date(2026, 10, 18)]
+        assert missing_days(datetime(2026, 10, 18, 15, tzinfo=UTC).timestamp(), today) == []
+
+    def test_contiguous_stops_at_gap(self):
+        responses = [history_day("2026-10-16"), [], history_day("2026-10-18")]
+        assert len(list(contiguous(responses))) == 24
+
+    def test_statistic_rows_continue_sum(self):
+        last_start = datetime(2026, 10, 17, 12, tzinfo=UTC).timestamp()  # 10 月 17 日 20 时
+        last = {
+            "temperature": LastStatistic(last_start, 0),
+            "humidity": LastStatistic(last_start, 0),
+            "precipitation": LastStatistic(last_start, 10.0),
+        }
+        rows = statistic_rows(contiguous([history_day("2026-10-17"), history_day("2026-10-18")]), last)
+        assert len(rows["temperature"]) == 3 + 24
+        assert rows["humidity"][0]["mean"] == 60
+        assert rows["precipitation"][-1]["sum"] == pytest.approx(10.0 + 27 * 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
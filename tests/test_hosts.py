@@ -0,0 +1,211 @@
+import asyncio
+from collections.abc import Callable
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import HEDGE_MIN_SAMPLES, HOST_PROBE_INTERVAL, QWeatherClient, QWeatherHosts
+
+PRIMARY = "api.qweather.com"
+BACKUP = "backup.qweather.com"
+
+
+class FakeResponse:
+    def __init__(self, status: int = 200) -> None:
+        self.status = status
+
+    async def read(self) -> bytes:
+        return b""
+
+
+class FakeSession:
+    """按 Host 返回预设的响应，记录请求过的 Host"""
+
+    def __init__(self, behaviors: dict[str, Callable[[], FakeResponse]]) -> None:
+        self.behaviors = behaviors
+        self.requests: list[str] = []
+
+    async def get(self, url: str, params=None, headers=None) -> FakeResponse:
+        host = url.split("/")[2]
+        self.requests.append(host)
+        return await self.behaviors[host]()
+
+
+def respond(status: int = 200, delay: float = 0) -> Callable:
+    async def behavior() -> FakeResponse:
+        await asyncio.sleep(delay)
+        return FakeResponse(status)
+
+    return behavior
+
+
+def fail() -> Callable:
+    async def behavior() -> FakeResponse:
+        raise TimeoutError
+
+    return behavior
+
+
+class HostsTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch("custom_components.qweather.api.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ordered_by_latency_then_errors(self):
+        hosts = QWeatherHosts(["a", "b", "c", "a"])
+        hosts.success("a", 0.3)
+        hosts.success("b", 0.1)
+        hosts.failure("c")
+        assert hosts.ordered() == ["b", "a", "c"]
+        hosts.failure("b")
+        hosts.failure("b")
+        assert hosts.ordered() == ["a", "c", "b"]
+
+    def test_unmeasured_hosts_keep_configured_order(self):
+        hosts = QWeatherHosts(["a", "b", "c"])
+        assert hosts.ordered() == ["a", "b", "c"]
+        hosts.success("a", 0.3)
+        assert hosts.ordered() == ["a", "b", "c"]
+        hosts.success("c", 0.1)
+        assert hosts.ordered() == ["c", "a", "b"]
+
+    def test_latency_moving_average(self):
+        hosts = QWeatherHosts(["a"])
+        hosts.success("a", 1.0)
+        hosts.success("a", 2.0)
+        assert hosts._latency["a"] == pytest.approx(1.2)  # noqa: SLF001
+
+    def test_probe_after_interval(self):
+        hosts = QWeatherHosts(["a", "b"])
+        hosts.failure("b")
+        assert hosts.due_for_probe() == []
+        self.now += HOST_PROBE_INTERVAL.total_seconds()
+        assert hosts.due_for_probe() == ["b"]
+        assert hosts.due_for_probe() == []
+        hosts.success("b", 0.1)
+        self.now += HOST_PROBE_INTERVAL.total_seconds()
+        assert hosts.due_for_probe() == []
+
+    def test_no_probe_for_host_tried_first(self):
+        hosts = QWeatherHosts(["a"])
+        hosts.failure("a")
+        self.now += HOST_PROBE_INTERVAL.total_seconds()
+        assert hosts.due_for_probe() == []
+
+
+class ClientHostTests(unittest.TestCase):
+    def client(self, session: FakeSession, api_host: str, *, hedge: bool = False) -> QWeatherClient:
+        return QWeatherClient(session, api_host, "key", "116.41", "39.92", True, hedge=hedge)
+
+    def test_single_host_failure_not_probed(self):
+        session = FakeSession({PRIMARY: fail()})
+        client = self.client(session, PRIMARY)
+
+        async def run():
+            with pytest.raises(TimeoutError):
+                await client._get("v7/grid-weather/now", client.params)  # noqa: SLF001
+            session.behaviors[PRIMARY] = respond()
+            with patch("custom_components.qweather.api.time.monotonic", lambda: 1e9):
+                await client._get("v7/grid-weather/now", client.params)  # noqa: SLF001
+            assert not client._probes  # noqa: SLF001
+
+        asyncio.run(run())
+        assert session.requests == [PRIMARY, PRIMARY]
+
+    def test_failover_to_next_host(self):
+        session = FakeSession({PRIMARY: fail(), BACKUP: respond()})
+        client = self.client(session, f"{PRIMARY},{BACKUP}")
+
+        response = asyncio.run(client._get("v7/grid-weather/now", client.params))  # noqa: SLF001
+        assert response.status == 200
+        assert session.requests == [PRIMARY, BACKUP]
+        # 出错的 Host 排到后面，下次直接请求可用的 Host
+        assert client.hosts.ordered() == [BACKUP, PRIMARY]
+
+    def test_failover_on_server_error(self):
+        session = FakeSession({PRIMARY: respond(503), BACKUP: respond(503)})
+        client = self.client(session, f"{PRIMARY},{BACKUP}")
+
+        response = asyncio.run(client._get("v7/grid-weather/now", client.params))  # noqa: SLF001
+        assert response.status == 503
+        assert session.requests == [PRIMARY, BACKUP]
+
+    def test_probe_degraded_host_in_background(self):
+        session = FakeSession({PRIMARY: fail(), BACKUP: respond()})
+        client = self.client(session, f"{PRIMARY},{BACKUP}")
+
+        async def run():
+            await client._get("v7/grid-weather/now", client.params)  # noqa: SLF001
+            session.behaviors[PRIMARY] = respond()
+            with patch("custom_components.qweather.api.time.monotonic", lambda: 1e9):
+                await client._get("v7/grid-weather/now", client.params)  # noqa: SLF001
+                await asyncio.gather(*client._probes)  # noqa: SLF001
+
+        asyncio.run(run())
+        # 第二次请求发往可用的 Host，同时在后台探测出错的 Host，探测成功后恢复使用
+        assert session.requests == [PRIMARY, BACKUP, BACKUP, PRIMARY]
+        assert not client.hosts._errors[PRIMARY]  # noqa: SLF001
+
+    def test_cancel_probes(self):
+        session = FakeSession({PRIMARY: respond(delay=10)})
+        client = self.client(session, PRIMARY)
+
+        async def run():
+            client._probe(PRIMARY, "v7/grid-weather/now", client.params, None)  # noqa: SLF001
+            probes = list(client._probes)  # noqa: SLF001
+            client.cancel_probes()
+            await asyncio.wait(probes)
+            assert all(probe.cancelled() for probe in probes)
+            assert not client._probes  # noqa: SLF001
+
+        asyncio.run(run())
+
+    def test_hedged_request_uses_next_host(self):
+        session = FakeSession({PRIMARY: respond(delay=1), BACKUP: respond()})
+        client = self.client(session, f"{PRIMARY},{BACKUP}", hedge=True)
+        client._latencies["v7/grid-weather/now"].extend([0.01] * HEDGE_MIN_SAMPLES)  # noqa: SLF001
+        client._requests = 100  # noqa: SLF001
+
+        response = asyncio.run(
+            client._hedged_get("v7/grid-weather/now", client.params, None, [PRIMARY, BACKUP])  # noqa: SLF001
+        )
+        assert response.status == 200
+        assert session.requests == [PRIMARY, BACKUP]
+        assert client._hedges == 1  # noqa: SLF001
+
+    def test_cancel_before_hedge_cancels_primary(self):
+        session = FakeSession({PRIMARY: respond(delay=10), BACKUP: respond()})
+        client = self.client(session, f"{PRIMARY},{BACKUP}", hedge=True)
+        client._latencies["v7/grid-weather/now"].extend([0.01] * HEDGE_MIN_SAMPLES)  # noqa: SLF001
+        client._requests = 100  # noqa: SLF001
+
+        async def run():
+            request = asyncio.create_task(
+                client._hedged_get("v7/grid-weather/now", client.params, None, [PRIMARY, BACKUP])  # noqa: SLF001
+            )
+            await asyncio.sleep(0.01)
+            request.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await request
+            # 还没有发出对冲请求时被取消，正在进行的主请求也随之取消
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        assert asyncio.run(run()) == []
+        assert session.requests == [PRIMARY]
+
+    def test_no_hedge_without_samples(self):
+        session = FakeSession({PRIMARY: respond(delay=0.01), BACKUP: respond()})
+        client = self.client(session, f"{PRIMARY},{BACKUP}", hedge=True)
+
+        asyncio.run(client._hedged_get("v7/grid-weather/now", client.params, None, [PRIMARY, BACKUP]))  # noqa: SLF001
+        assert session.requests == [PRIMARY]
+        assert client._hedges == 0  # noqa: SLF001
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import QWeatherClient
+from custom_components.qweather.sensor import indices_category
+import homeassistant.util.dt as dt_util
+
+
+def item(index_type: str, day: str, category: str = "适宜") -> dict[str, str]:
+    return {"date": day, "type": index_type, "name": f"指数 {index_type}", "level": "1", "category": category}
+
+
+class IndicesTests(unittest.TestCase):
+    def setUp(self):
+        self.today = datetime(2026, 10, 19, 8, tzinfo=dt_util.get_default_time_zone())
+        self.client = QWeatherClient(None, "api.qweather.com", "key", "116.41", "39.92", True, indices=["1", "3"])
+        self.calls: list[tuple[str, dict | None]] = []
+
+        async def api_get_v7(api, extra_params=None):
+            self.calls.append((api, extra_params))
+            day = self.today.date().isoformat()
+            return {"code": "200", "daily": [item("1", day), item("3", day, "较舒适")]}
+
+        self.client.api_get_v7 = api_get_v7
+        patcher = patch.object(dt_util, "now", lambda: self.today)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def update(self) -> dict[str, dict]:
+        return asyncio.run(self.client.update_indices_1d())
+
+    def test_keyed_by_type(self):
+        data = self.update()
+        assert list(data) == ["1", "3"]
+        assert self.calls == [("indices/1d", {"type": "1,3"})]
+        assert indices_category("3")(data) == "较舒适"
+        assert indices_category("5")(data) is None
+        assert indices_category("1")(None) is None
+
+    def test_cached_until_next_day(self):
+        self.update()
+        self.today = self.today.replace(hour=23)
+        self.update()
+        assert len(self.calls) == 1
+
+        self.today = datetime(2026, 10, 20, 0, 5, tzinfo=self.today.tzinfo)
+        assert self.update()["1"]["date"] == "2026-10-20"
+        assert len(self.calls) == 2
+
+    def test_no_indices_no_request(self):
+        self.client.indices = ""
+        assert self.update() == {}
+        assert self.calls == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import time
+import timeit
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat
+
+from custom_components.qweather.api import QWeatherJwt
+
+
+class QWeatherJwtTests(unittest.TestCase):
+    def setUp(self):
+        private_key = Ed25519PrivateKey.generate()
+        pem = private_key.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()).decode()
+        self.auth = QWeatherJwt("project", "credential", pem)
+
+    def test_token_is_signed_once_per_validity_window(self):
+        with patch.object(self.auth, "sign", wraps=self.auth.sign) as sign:
+            tokens = {self.auth.token for _ in range(1000)}
+        assert len(tokens) == 1
+        assert sign.call_count == 1
+
+    def test_token_is_refreshed_before_expiry(self):
+        token = self.auth.token
+        later = time.time() + QWeatherJwt.ttl - QWeatherJwt.refresh_margin
+        with patch("custom_components.qweather.api.time.time", return_value=later):
+            assert self.auth.token != token
+
+    def test_benchmark_signing_is_off_the_request_path(self):
+        self.auth.token  # noqa: B018
+        cached = timeit.timeit(lambda: self.auth.headers, number=1000)
+        signing = timeit.timeit(lambda: self.auth.sign(int(time.time())), number=1000)
+        assert cached * 10 < signing
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import asyncio
+from http import HTTPStatus
+import inspect
+import tempfile
+from types import MappingProxyType
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather import async_setup_entry
+from custom_components.qweather.api import QWeatherClient
+from custom_components.qweather.config_flow import QWeatherFlowHandler
+from custom_components.qweather.const import CONF_API_HOST, CONF_GRID, CONF_INDICES, CONF_LOCATION_ID, DOMAIN
+from homeassistant.config_entries import ConfigEntries, ConfigEntry, ConfigEntryState
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE, CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import frame
+
+BEIJING = "101010100"
+SHANGHAI = "101020100"
+CITIES = {"116.41,39.92": BEIJING, "121.47,31.23": SHANGHAI}
+
+
+class FakeResponse:
+    def __init__(self, json_data: dict, status: int = HTTPStatus.OK) -> None:
+        self.status = status
+        self.json_data = json_data
+
+    async def json(self) -> dict:
+        return self.json_data
+
+
+def respond(path: str, params) -> FakeResponse:
+    """按坐标返回城市，其他接口返回空的成功响应"""
+    if path.endswith("geo/v2/city/lookup"):
+        return FakeResponse({"code": "200", "location": [{"id": CITIES[params["location"]]}]})
+    return FakeResponse({"code": "200"})
+
+
+class ClientLocationTests(unittest.TestCase):
+    def client(self, grid_weather: bool, location_id: str | None = None) -> QWeatherClient:
+        client = QWeatherClient(
+            None, "api.qweather.com", "key", "116.41", "39.92", grid_weather, location_id=location_id
+        )
+        self.requests: list[tuple[str, str]] = []
+
+        async def get(path, params):
+            self.requests.append((path, params["location"]))
+            return respond(path, params)
+
+        client._get = get  # noqa: SLF001
+        return client
+
+    def update(self, client: QWeatherClient) -> None:
+        async def run():
+            for method in ("update_observation", "update_hourly_forecast", "update_warning_now"):
+                await getattr(client, method)()
+
+        asyncio.run(run())
+
+    def test_city_weather_by_location_id(self):
+        self.update(self.client(False))
+        assert self.requests == [
+            ("geo/v2/city/lookup", "116.41,39.92"),
+            ("v7/weather/now", BEIJING),
+            ("v7/weather/24h", BEIJING),
+            ("v7/warning/now", BEIJING),
+        ]
+
+    def test_stored_location_id_skips_lookup(self):
+        self.update(self.client(False, location_id=BEIJING))
+        assert [location for _, location in self.requests] == [BEIJING] * 3
+
+    def test_grid_weather_by_coordinates(self):
+        self.update(self.client(True))
+        assert self.requests == [
+            ("v7/grid-weather/now", "116.41,39.92"),
+            ("v7/grid-weather/24h", "116.41,39.92"),
+            ("v7/warning/now", "116.41,39.92"),
+        ]
+
+    def test_retarget_resolves_again(self):
+        client = self.client(False, location_id=BEIJING)
+        client.retarget("121.47", "31.23")
+        asyncio.run(client.update_observation())
+        assert self.requests == [("geo/v2/city/lookup", "121.47,31.23"), ("v7/weather/now", SHANGHAI)]
+
+        # 回到访问过的格点时复用缓存的 LocationID
+        client.retarget("116.41", "39.92")
+        asyncio.run(client.update_observation())
+        assert self.requests[-1] == ("v7/weather/now", BEIJING)
+        assert len(self.requests) == 3
+
+
+class EntryLocationTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hass = HomeAssistant(tempfile.mkdtemp())
+        if hasattr(frame, "async_setup"):
+            frame.async_setup(self.hass)
+        self.hass.config_entries = ConfigEntries(self.hass, {})
+        self.requests: list[str] = []
+
+    async def asyncTearDown(self):
+        await self.hass.async_stop(force=True)
+
+    async def _get(self, path: str, params) -> FakeResponse:
+        self.requests.append(path)
+        return respond(path, params)
+
+    def entry(self, location_id: str | None, grid_weather: bool = False) -> ConfigEntry:
+        kwargs = {
+            "data": {
+                CONF_API_HOST: "api.qweather.com",
+                CONF_API_KEY: "key",
+                CONF_NAME: "home",
+                CONF_LONGITUDE: 116.41,
+                CONF_LATITUDE: 39.92,
+                CONF_LOCATION_ID: location_id,
+            },
+            "discovery_keys": MappingProxyType({}),
+            "domain": DOMAIN,
+            "minor_version": 1,
+            "options": {CONF_GRID: grid_weather, CONF_INDICES: []},
+            "source": "user",
+            "state": ConfigEntryState.SETUP_IN_PROGRESS,
+            "title": "home",
+            "unique_id": "116_41_39_92",
+            "version": 1,
+        }
+        # 较新的 HA 版本必须提供子条目
+        if "subentries_data" in inspect.signature(ConfigEntry).parameters:
+            kwargs["subentries_data"] = None
+        entry = ConfigEntry(**kwargs)
+        self.hass.config_entries._entries[entry.entry_id] = entry  # noqa: SLF001
+        return entry
+
+    async def setup(self, entry: ConfigEntry) -> None:
+        with (
+            patch.object(QWeatherClient, "_get", self._get),
+            patch.object(self.hass.config_entries, "async_forward_entry_setups", AsyncMock()),
+        ):
+            assert await async_setup_entry(self.hass, entry)
+        for unload in entry._on_unload or []:  # noqa: SLF001
+            if inspect.isawaitable(result := unload()):
+                await result
+
+    async def test_location_id_written_back(self):
+        entry = self.entry(None)
+        await self.setup(entry)
+        assert entry.data[CONF_LOCATION_ID] == BEIJING
+        assert self.requests.count("geo/v2/city/lookup") == 1
+
+    async def test_stored_location_id_used(self):
+        entry = self.entry(SHANGHAI)
+        await self.setup(entry)
+        assert "geo/v2/city/lookup" not in self.requests
+        assert entry.data[CONF_LOCATION_ID] == SHANGHAI
+
+    async def test_grid_weather_not_written_back(self):
+        entry = self.entry(None, grid_weather=True)
+        await self.setup(entry)
+        assert "geo/v2/city/lookup" not in self.requests
+        assert entry.data[CONF_LOCATION_ID] is None
+
+
+class FlowLocationTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hass = HomeAssistant(tempfile.mkdtemp())
+        self.hass.config_entries = ConfigEntries(self.hass, {})
+        self.flow = QWeatherFlowHandler()
+        self.flow.hass = self.hass
+        self.flow.handler = DOMAIN
+        self.flow.flow_id = "flow"
+        self.flow.context = {"source": "user"}
+        self.requests: list[tuple[str, dict]] = []
+
+    async def asyncTearDown(self):
+        await self.hass.async_stop(force=True)
+
+    async def test_location_id_saved(self):
+        async def get(url, params=None, headers=None):
+            self.requests.append((url, params))
+            return respond(url, params)
+
+        session = type("Session", (), {"get": staticmethod(get)})
+        user_input = {
+            CONF_API_HOST: "api.qweather.com, backup.qweather.com",
+            CONF_API_KEY: "key",
+            CONF_NAME: "home",
+            CONF_LONGITUDE: 116.4074,
+            CONF_LATITUDE: 39.9163,
+            CONF_GRID: False,
+        }
+        with patch("custom_components.qweather.config_flow.async_get_clientsession", lambda _: session):
+            result = await self.flow.async_step_user(user_input)
+        # 多个 Host 时用主 Host 按坐标查询 LocationID
+        assert self.requests == [
+            ("https://api.qweather.com/geo/v2/city/lookup", {"location": "116.41,39.92", "key": "key"})
+        ]
+        assert result["data"][CONF_LOCATION_ID] == BEIJING
+
+
+if __name__ == "__main__":
+    unittest.main()
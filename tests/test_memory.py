@@ -0,0 +1,112 @@
+import asyncio
+import gc
+import json
+import random
+import tracemalloc
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import QWeatherClient
+from custom_components.qweather.weather import daily_forecast, hourly_forecast
+
+LOCATIONS = 200
+# 每个位置 30 天逐日预报 + 24 小时逐小时预报转换后，连同客户端的远期预报缓存常驻内存的上限；
+# 缓存原始响应时约 64 KB
+MEMORY_BUDGET_PER_LOCATION = 48 * 1024
+
+
+def fake_payload(seed: int) -> tuple[list, list]:
+    rnd = random.Random(seed)
+    daily = [
+        {
+            "fxDate": f"2026-{10 + (18 + day) // 31:02d}-{(18 + day) % 31 + 1:02d}",
+            "sunrise": "06:58",
+            "sunset": "16:59",
+            "tempMax": str(rnd.randint(10, 30)),
+            "tempMin": str(rnd.randint(-5, 10)),
+            "iconDay": "101",
+            "textDay": "多云",
+            "iconNight": "150",
+            "textNight": "晴",
+            "wind360Day": str(rnd.randint(0, 359)),
+            "windDirDay": "东北风",
+            "windSpeedDay": str(rnd.randint(1, 30)),
+            "humidity": str(rnd.randint(20, 99)),
+            "precip": "0.0",
+            "pressure": str(rnd.randint(990, 1030)),
+            "cloud": str(rnd.randint(0, 100)),
+            "uvIndex": str(rnd.randint(0, 11)),
+        }
+        for day in range(30)
+    ]
+    hourly = [
+        {
+            "fxTime": f"2026-10-19T{hour:02d}:00+08:00",
+            "temp": str(rnd.randint(5, 30)),
+            "icon": "100",
+            "text": "晴",
+            "wind360": str(rnd.randint(0, 359)),
+            "windDir": "西北风",
+            "windSpeed": str(rnd.randint(1, 30)),
+            "humidity": str(rnd.randint(20, 99)),
+            "pop": str(rnd.randint(0, 100)),
+            "precip": "0.0",
+            "pressure": str(rnd.randint(990, 1030)),
+            "cloud": str(rnd.randint(0, 100)),
+            "dew": str(rnd.randint(-25, 20)),
+        }
+        for hour in range(24)
+    ]
+    # 经过 JSON 解析，与真实响应一样每个字符串都是独立对象
+    return json.loads(json.dumps(daily)), json.loads(json.dumps(hourly))
+
+
+async def fetch_daily(clients: list[QWeatherClient], payloads: list[tuple[list, list]]) -> list[list]:
+    """每个客户端请求一次每日预报（首次请求取远期预报并缓存），响应由 payloads 提供"""
+    results = []
+    for client, (daily, _) in zip(clients, payloads, strict=True):
+
+        async def api_get_v7(_api, _extra_params=None, daily=daily):
+            return {"code": "200", "daily": daily}
+
+        client.api_get_v7 = api_get_v7
+        results.append(await client.update_daily_forecast())
+        del client.api_get_v7
+    return results
+
+
+class MemoryBudgetTests(unittest.TestCase):
+    def test_retained_forecast_memory_per_location(self):
+        clients = [QWeatherClient(None, "api.qweather.com", "key", "116.41", "39.92", True) for _ in range(LOCATIONS)]
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            payloads = [fake_payload(seed) for seed in range(LOCATIONS)]
+            fetched = asyncio.run(fetch_daily(clients, payloads))
+            retained = [
+                (daily_forecast(daily), hourly_forecast(hourly, 39.92, 116.41))
+                for daily, (_, hourly) in zip(fetched, payloads, strict=True)
+            ]
+            # 与天气实体一样转换后丢弃原始数据，只剩转换结果和客户端缓存
+            del payloads, fetched
+            gc.collect()
+            per_location = (tracemalloc.get_traced_memory()[0] - before) / LOCATIONS
+        finally:
+            tracemalloc.stop()
+        assert len(retained) == LOCATIONS
+        assert per_location < MEMORY_BUDGET_PER_LOCATION, f"{per_location:.0f} bytes per location"
+
+    def test_long_range_cache_keeps_converted_fields(self):
+        daily, _ = fake_payload(0)
+        client = QWeatherClient(None, "api.qweather.com", "key", "116.41", "39.92", True)
+        (fetched,) = asyncio.run(fetch_daily([client], [(daily, [])]))
+        assert daily_forecast(fetched) == daily_forecast(daily)
+        assert "textDay" not in fetched[0]
+
+
+if __name__ == "__main__":
+    unittest.main()
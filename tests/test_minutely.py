@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import (
+    MINUTELY_DRY_INTERVAL,
+    MINUTELY_INTERVAL,
+    MINUTELY_WET_INTERVAL,
+    QWeatherClient,
+)
+
+
+def hourly(pop: str = "0", icon: str = "100") -> dict[str, str]:
+    return {"fxTime": "2026-10-19T12:00+08:00", "icon": icon, "precip": "0.0", "pop": pop}
+
+
+class MinutelyIntervalTests(unittest.TestCase):
+    def setUp(self):
+        self.client = QWeatherClient(None, "api.qweather.com", "key", "116.41", "39.92", True)
+        self.responses: dict[str, dict] = {
+            "grid-weather/now": {"code": "200", "now": {"icon": "100", "precip": "0.0"}},
+            "minutely/5m": {"code": "200", "summary": "", "minutely": [{"precip": "0.00"}] * 24},
+            "grid-weather/24h": {"code": "200", "hourly": [hourly()] * 24},
+        }
+
+        async def api_get_v7(api, extra_params=None):
+            return self.responses[api]
+
+        self.client.api_get_v7 = api_get_v7
+
+    def update(self, *methods: str) -> None:
+        async def run():
+            for method in methods:
+                await getattr(self.client, method)()
+
+        asyncio.run(run())
+
+    def test_unknown_until_observation_and_minutely(self):
+        assert self.client.minutely_interval() == MINUTELY_INTERVAL
+        self.update("update_observation")
+        assert self.client.minutely_interval() == MINUTELY_INTERVAL
+
+    def test_dry_without_hourly_forecast(self):
+        # 逐小时预报没有订阅时，分钟级降水本身的 2 小时预报足以放宽间隔
+        self.update("update_observation", "update_minutely_precipitation")
+        assert self.client.minutely_interval() == MINUTELY_DRY_INTERVAL
+
+    def test_wet_now(self):
+        self.responses["grid-weather/now"]["now"] = {"icon": "305", "precip": "0.5"}
+        self.update("update_observation", "update_minutely_precipitation")
+        assert self.client.minutely_interval() == MINUTELY_WET_INTERVAL
+
+    def test_wet_minutely(self):
+        self.responses["minutely/5m"]["minutely"] = [{"precip": "0.00"}] * 20 + [{"precip": "0.12"}] * 4
+        self.update("update_observation", "update_minutely_precipitation")
+        assert self.client.minutely_interval() == MINUTELY_WET_INTERVAL
+
+    def test_hourly_pop_tightens_until_stale(self):
+        self.responses["grid-weather/24h"]["hourly"] = [hourly(), hourly(pop="40")] + [hourly()] * 22
+        self.update("update_observation", "update_minutely_precipitation", "update_hourly_forecast")
+        assert self.client.minutely_interval() == MINUTELY_WET_INTERVAL
+
+        with patch("custom_components.qweather.api.datetime") as mock_datetime:
+            # 取到逐小时预报之后 PRECIP_AHEAD_MAX_AGE 内没有再更新（不再有订阅）
+            mock_datetime.now.return_value.timestamp.return_value = self.client._precip_ahead_until  # noqa: SLF001
+            assert self.client.minutely_interval() == MINUTELY_DRY_INTERVAL
+
+    def test_hourly_pop_beyond_lookahead(self):
+        self.responses["grid-weather/24h"]["hourly"] = [hourly()] * 3 + [hourly(pop="80")] * 21
+        self.update("update_observation", "update_minutely_precipitation", "update_hourly_forecast")
+        assert self.client.minutely_interval() == MINUTELY_DRY_INTERVAL
+
+    def test_retarget_resets_outlook(self):
+        self.update("update_observation", "update_minutely_precipitation")
+        self.client.retarget("121.47", "31.23")
+        assert self.client.minutely_interval() == MINUTELY_INTERVAL
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import asyncio
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from tests.scale_harness import run
+
+
+class ScaleTests(unittest.TestCase):
+    def test_ten_locations(self):
+        result = asyncio.run(run(10, cycles=2, latency=0.005))
+        assert result["failed_coordinators"] == 0
+        assert result["requests"] >= 10 * 2 * 5
+        assert result["reused_connections"] > result["new_connections"]
+        assert result["loop_lag"]["p99"] < 0.25
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import tempfile
+from types import SimpleNamespace
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.binary_sensor import QWeatherWarningBinarySensor
+from custom_components.qweather.const import DOMAIN
+from custom_components.qweather.services import SERVICE_GET_WARNINGS, async_setup_services, websocket_warnings
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+
+
+def warning(warning_id: str, title: str = "大风蓝色预警") -> dict[str, str]:
+    return {
+        "id": warning_id,
+        "sender": "北京市气象台",
+        "title": f"北京市气象台发布{title}",
+        "text": "预计今天下午到夜间，本市大部分地区有 5 级左右偏北风，阵风 7 级左右。" * 4,
+        "type": "1006",
+        "severity": "Minor",
+        "status": "active",
+    }
+
+
+def entry(entry_id: str, warnings: list | None, state: ConfigEntryState = ConfigEntryState.LOADED) -> SimpleNamespace:
+    return SimpleNamespace(
+        entry_id=entry_id,
+        state=state,
+        runtime_data=SimpleNamespace(warning_now=SimpleNamespace(data=warnings)),
+    )
+
+
+class FakeConfigEntries:
+    def __init__(self, *entries: SimpleNamespace) -> None:
+        self.entries = {entry.entry_id: entry for entry in entries}
+
+    def async_entries(self, domain: str) -> list[SimpleNamespace]:
+        return list(self.entries.values())
+
+    def async_get_entry(self, entry_id: str) -> SimpleNamespace | None:
+        return self.entries.get(entry_id)
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.results: list = []
+        self.errors: list = []
+
+    def send_result(self, msg_id: int, result) -> None:
+        self.results.append((msg_id, result))
+
+    def send_error(self, msg_id: int, code: str, message: str) -> None:
+        self.errors.append((msg_id, code, message))
+
+
+class WarningAttributesTests(unittest.TestCase):
+    def test_attributes_keep_only_id_type_and_severity(self):
+        coordinator = SimpleNamespace(data=[warning("1"), warning("2", "寒潮黄色预警")])
+        config_entry = SimpleNamespace(unique_id="home", data={CONF_NAME: "home"})
+        sensor = QWeatherWarningBinarySensor(coordinator, config_entry)
+        assert sensor.is_on
+        assert sensor.extra_state_attributes == {
+            "warning": [
+                {"id": "1", "type": "1006", "severity": "Minor"},
+                {"id": "2", "type": "1006", "severity": "Minor"},
+            ]
+        }
+
+        sensor._async_update_attrs([])  # noqa: SLF001
+        assert not sensor.is_on
+        assert sensor.extra_state_attributes == {"warning": []}
+
+
+class WarningServiceTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hass = HomeAssistant(tempfile.mkdtemp())
+        # 两个位置在同一城市，收到同一条预警
+        self.hass.config_entries = FakeConfigEntries(
+            entry("beijing", [warning("1"), warning("2", "寒潮黄色预警")]),
+            entry("haidian", [warning("1")]),
+            entry("shanghai", None),
+            entry("unloaded", [warning("3")], ConfigEntryState.NOT_LOADED),
+        )
+        async_setup_services(self.hass)
+
+    async def asyncTearDown(self):
+        await self.hass.async_stop(force=True)
+
+    async def get_warnings(self, **data) -> dict:
+        return await self.hass.services.async_call(
+            DOMAIN, SERVICE_GET_WARNINGS, data, blocking=True, return_response=True
+        )
+
+    async def test_service_deduplicates_across_entries(self):
+        response = await self.get_warnings()
+        assert [item["id"] for item in response["warnings"]] == ["1", "2"]
+        assert response["warnings"][0]["text"] == warning("1")["text"]
+
+    async def test_service_single_entry(self):
+        response = await self.get_warnings(config_entry_id="haidian")
+        assert [item["id"] for item in response["warnings"]] == ["1"]
+        assert (await self.get_warnings(config_entry_id="unloaded"))["warnings"] == []
+
+    async def test_service_unknown_entry(self):
+        with pytest.raises(ServiceValidationError):
+            await self.get_warnings(config_entry_id="missing")
+
+    async def test_websocket_command(self):
+        connection = FakeConnection()
+        websocket_warnings(self.hass, connection, {"id": 1, "type": f"{DOMAIN}/warnings"})
+        websocket_warnings(self.hass, connection, {"id": 2, "type": f"{DOMAIN}/warnings", "entry_id": "missing"})
+        assert [(msg_id, [item["id"] for item in result["warnings"]]) for msg_id, result in connection.results] == [
+            (1, ["1", "2"])
+        ]
+        assert connection.errors == [(2, "not_found", "Config entry not found: missing")]
+
+
+if __name__ == "__main__":
+    unittest.main()
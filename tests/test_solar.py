@@ -0,0 +1,38 @@
+from datetime import UTC, date, datetime, timedelta, timezone
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.solar import daytime_flags, sun_elevation, sun_times
+
+BEIJING = (39.92, 116.41)
+CST = timezone(timedelta(hours=8))
+
+
+class SolarTests(unittest.TestCase):
+    def test_sun_times(self):
+        sun = sun_times(date(2026, 10, 19), *BEIJING)
+        assert abs(sun.sunrise - datetime(2026, 10, 19, 6, 29, tzinfo=CST)) < timedelta(minutes=2)
+        assert abs(sun.sunset - datetime(2026, 10, 19, 17, 30, tzinfo=CST)) < timedelta(minutes=2)
+
+    def test_polar_day_and_night(self):
+        assert sun_times(date(2026, 6, 21), 78.2, 15.6).polar_day
+        assert sun_times(date(2026, 12, 21), 78.2, 15.6).sunrise is None
+        assert not sun_times(date(2026, 12, 21), 78.2, 15.6).polar_day
+
+    def test_sun_elevation(self):
+        assert sun_elevation(datetime(2026, 10, 19, 12, tzinfo=CST), *BEIJING) > 35
+        assert sun_elevation(datetime(2026, 10, 19, 0, tzinfo=CST), *BEIJING) < -30
+
+    def test_daytime_flags(self):
+        hours = [datetime(2026, 10, 19, hour, tzinfo=CST) for hour in range(24)]
+        assert daytime_flags(hours, *BEIJING) == [7 <= hour <= 17 for hour in range(24)]
+        # 西半球：UTC 日期与当地日期不同
+        los_angeles = [datetime(2026, 10, 19, hour, tzinfo=UTC) for hour in range(24)]
+        assert daytime_flags(los_angeles, 34.05, -118.24) == [hour <= 1 or hour >= 15 for hour in range(24)]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import QWeatherClient
+from custom_components.qweather.tracker import MIN_INTERVAL, LocationTracker, distance_km, grid_cell
+from homeassistant.core import State
+
+ENTITY_ID = "person.me"
+
+
+class FakeCoordinator:
+    def __init__(self) -> None:
+        self.refreshes = 0
+
+    async def async_request_refresh(self) -> None:
+        self.refreshes += 1
+
+
+class FakeCoordinators(list):
+    def __init__(self, client: QWeatherClient) -> None:
+        super().__init__([FakeCoordinator(), FakeCoordinator()])
+        self.client = client
+
+
+class GeometryTests(unittest.TestCase):
+    def test_grid_cell(self):
+        assert grid_cell(39.9163, 116.4074) == ("116.41", "39.92")
+
+    def test_distance_km(self):
+        assert distance_km(39.92, 116.41, 39.92, 116.41) == 0
+        assert distance_km(39.92, 116.41, 39.93, 116.41) == pytest.approx(1.11, abs=0.01)
+        assert distance_km(39.92, 116.41, 31.23, 121.47) == pytest.approx(1067, abs=5)
+
+
+class LocationTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.later: list = []
+        self.delay = 0.0
+        self.state: State | None = None
+        self.client = QWeatherClient(None, "api.qweather.com", "key", "116.41", "39.92", True)
+        self.coordinators = FakeCoordinators(self.client)
+        hass = SimpleNamespace(states=SimpleNamespace(get=lambda _: self.state), async_create_task=self._run)
+        self.tracker = LocationTracker(hass, self.coordinators, ENTITY_ID)
+        for patcher in (
+            patch("custom_components.qweather.tracker.time.monotonic", lambda: self.now),
+            patch("custom_components.qweather.tracker.async_call_later", self._call_later),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _run(coro) -> None:
+        # 请求刷新的协程没有 await，直接执行到结束
+        with pytest.raises(StopIteration):
+            coro.send(None)
+
+    def _call_later(self, _hass, delay, action):
+        self.delay = delay
+        self.later.append(action)
+        return lambda: self.later.remove(action)
+
+    def move(self, latitude: float, longitude: float) -> None:
+        self.state = State(ENTITY_ID, "not_home", {"latitude": latitude, "longitude": longitude})
+        self.tracker._async_evaluate(self.state)  # noqa: SLF001
+
+    @property
+    def refreshes(self) -> int:
+        return sum(coordinator.refreshes for coordinator in self.coordinators)
+
+    def test_move_under_threshold(self):
+        self.move(39.93, 116.41)  # 换了格点，但只移动了约 1.1 公里
+        assert self.client.params["location"] == "116.41,39.92"
+        assert self.refreshes == 0
+
+    def test_move_over_threshold(self):
+        self.move(39.94, 116.41)
+        assert self.client.params["location"] == "116.41,39.94"
+        assert self.refreshes == 2
+
+    def test_retry_after_min_interval(self):
+        self.move(39.94, 116.41)
+        self.now += 60
+        self.move(39.96, 116.41)
+        assert self.client.params["location"] == "116.41,39.94"
+        assert len(self.later) == 1
+        assert self.delay == pytest.approx(MIN_INTERVAL.total_seconds() - 60)
+
+        # 间隔内继续移动只保留一次重试，到期后按最新位置切换
+        self.move(39.98, 116.41)
+        assert len(self.later) == 1
+        self.now += self.delay
+        self.later.pop()(None)
+        assert self.client.params["location"] == "116.41,39.98"
+        assert self.later == []
+
+    def test_retarget_to_cached_cell(self):
+        self.client.location_id = "101010100"
+        self.client._daily_long = [{"fxDate": "2026-10-25"}]  # noqa: SLF001
+        self.move(39.94, 116.41)
+        assert self.client.location_id is None
+        assert self.client._daily_long == []  # noqa: SLF001
+
+        self.now += MIN_INTERVAL.total_seconds()
+        self.move(39.92, 116.41)
+        assert self.client.params["location"] == "116.41,39.92"
+        assert self.client.location_id == "101010100"
+        assert self.client._daily_long == [{"fxDate": "2026-10-25"}]  # noqa: SLF001
+
+    def test_start_without_refresh(self):
+        self.state = State(ENTITY_ID, "not_home", {"latitude": 31.23, "longitude": 121.47})
+        with patch("custom_components.qweather.tracker.async_track_state_change_event", lambda *_: lambda: None):
+            self.tracker.async_start()
+        assert self.client.params["location"] == "121.47,31.23"
+        assert self.refreshes == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.api import QWeatherClient, QWeatherWarningList
+
+WARNING = {"id": "10101010020261019", "title": "北京市气象台发布大风蓝色预警"}
+
+
+def client(warning_list: QWeatherWarningList, location_id: str, calls: list[str]) -> QWeatherClient:
+    qweather = QWeatherClient(
+        None, "api.qweather.com", "key", "116.41", "39.92", False, warning_list=warning_list, location_id=location_id
+    )
+
+    async def api_get_v7(api, extra_params=None):
+        calls.append(api)
+        if api == "warning/list":
+            return {"code": "200", "warningLocList": [{"locationId": "101010100"}]}
+        return {"code": "200", "warning": [WARNING]}
+
+    qweather.api_get_v7 = api_get_v7
+    return qweather
+
+
+class WarningListTests(unittest.TestCase):
+    def setUp(self):
+        self.warning_list = QWeatherWarningList("cn")
+        self.calls: list[str] = []
+
+    def test_shared_list(self):
+        self.warning_list.subscribers = 3
+        clients = [client(self.warning_list, location_id, self.calls) for location_id in ("101010100", "101020100")]
+        clients.append(client(self.warning_list, "101010100", self.calls))
+
+        async def update():
+            return [await qweather.update_warning_now() for qweather in clients]
+
+        assert asyncio.run(update()) == [[WARNING], [], [WARNING]]
+        assert self.calls == ["warning/list", "warning/now"]
+
+    def test_single_location_queries_directly(self):
+        self.warning_list.subscribers = 1
+        qweather = client(self.warning_list, "101020100", self.calls)
+        assert asyncio.run(qweather.update_warning_now()) == [WARNING]
+        assert self.calls == ["warning/now"]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+from datetime import timedelta
+import logging
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.waves import WAVE_LEAD, RefreshWaves
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, TimestampDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WaveTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hass = HomeAssistant(tempfile.mkdtemp())
+        self.timers: list[float] = []
+        self.events: list[str] = []
+        patcher = patch("custom_components.qweather.waves.async_call_later", self._call_later)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        for coordinator in getattr(self, "coordinators", []):
+            await coordinator.async_shutdown()
+
+    @staticmethod
+    def elapse(waves: RefreshWaves, seconds: float) -> None:
+        """把上次刷新时间提前，相当于经过了 seconds 秒"""
+        for coordinator in waves._last:  # noqa: SLF001
+            waves._last[coordinator] -= seconds  # noqa: SLF001
+
+    def _call_later(self, _hass, delay, _action):
+        self.timers.append(delay)
+        return lambda: None
+
+    def coordinator(self, name: str, minutes: int, delay: float = 0, fail: bool = False) -> DataUpdateCoordinator:
+        async def update():
+            self.events.append(f"fetch {name}")
+            await asyncio.sleep(delay)
+            self.events.append(f"fetched {name}")
+            if fail:
+                raise ValueError(name)
+            return name
+
+        return TimestampDataUpdateCoordinator(
+            self.hass,
+            _LOGGER,
+            config_entry=None,
+            name=name,
+            update_method=update,
+            update_interval=timedelta(minutes=minutes),
+        )
+
+    def start(self, *coordinators: DataUpdateCoordinator, unsubscribed: tuple = ()) -> RefreshWaves:
+        self.coordinators = coordinators + unsubscribed
+        for coordinator in coordinators:
+            coordinator.async_add_listener(lambda name=coordinator.name: self.events.append(f"listener {name}"))
+        waves = RefreshWaves(self.hass, self.coordinators)
+        self.addCleanup(waves.async_start())
+        return waves
+
+    async def test_schedule_before_earliest_due(self):
+        self.start(self.coordinator("a", 10), self.coordinator("b", 30))
+        assert self.timers == [pytest.approx(600 - WAVE_LEAD.total_seconds(), abs=1)]
+
+    async def test_wave_groups_due_within_tolerance(self):
+        a, b, c = self.coordinator("a", 10), self.coordinator("b", 11), self.coordinator("c", 30)
+        waves = self.start(a, b, c)
+        self.elapse(waves, 600 - WAVE_LEAD.total_seconds())
+        await waves._async_wave(None)  # noqa: SLF001
+        assert sorted(event for event in self.events if event.startswith("fetch ")) == ["fetch a", "fetch b"]
+        assert a.data == "a"
+        assert b.data == "b"
+        assert c.data is None
+        # c 的下一次到期在 30 分钟，a、b 从本次波次重新计时
+        assert self.timers[-1] == pytest.approx(600 - WAVE_LEAD.total_seconds(), abs=1)
+
+    async def test_listeners_after_all_fetches(self):
+        a, b = self.coordinator("a", 10), self.coordinator("b", 10, delay=0.05)
+        waves = self.start(a, b)
+        self.elapse(waves, 600)
+        await waves._async_wave(None)  # noqa: SLF001
+        # 先取到数据的 a 等待 b，两者一起交付给监听者
+        assert sorted(self.events[-2:]) == ["listener a", "listener b"]
+        assert self.events.index("fetched b") < self.events.index("listener a")
+
+    async def test_wave_replaces_coordinator_timer(self):
+        a = self.coordinator("a", 10, delay=0.05)
+        waves = self.start(a)
+        self.elapse(waves, 600)
+        wave = asyncio.create_task(waves._async_wave(None))  # noqa: SLF001
+        await asyncio.sleep(0.01)
+        # 请求进行中协调器自身的定时器已取消，不会再发出重复的请求
+        assert self.events == ["fetch a"]
+        assert a._unsub_refresh is None  # noqa: SLF001
+        await wave
+        assert a._unsub_refresh is not None  # noqa: SLF001
+        assert a.last_update_success_time is not None
+
+    async def test_unsubscribed_coordinator_not_refreshed(self):
+        a, hourly = self.coordinator("a", 10), self.coordinator("hourly", 10)
+        waves = self.start(a, unsubscribed=(hourly,))
+        # 开始调度不会启动没有订阅的协调器自身的定时器
+        assert hourly._unsub_refresh is None  # noqa: SLF001
+        self.elapse(waves, 600)
+        await waves._async_wave(None)  # noqa: SLF001
+        assert self.events[0] == "fetch a"
+        assert "fetch hourly" not in self.events
+        assert hourly.data is None
+        assert hourly._unsub_refresh is None  # noqa: SLF001
+
+        # 没有订阅的协调器不参与调度，只剩下它时不再安排波次
+        waves.coordinators.remove(a)
+        self.timers.clear()
+        waves._async_schedule()  # noqa: SLF001
+        assert self.timers == []
+
+    async def test_refresh_outside_wave_reschedules(self):
+        a = self.coordinator("a", 10)
+        waves = self.start(a)
+        self.elapse(waves, 300)
+        await a.async_refresh()
+        # 按需刷新之后从刷新时间重新计算到期时间
+        assert self.timers[-1] == pytest.approx(600 - WAVE_LEAD.total_seconds(), abs=1)
+
+    async def test_failed_refresh(self):
+        a, b = self.coordinator("a", 10, fail=True), self.coordinator("b", 10)
+        waves = self.start(a, b)
+        self.elapse(waves, 600)
+        await waves._async_wave(None)  # noqa: SLF001
+        assert not a.last_update_success
+        assert isinstance(a.last_exception, ValueError)
+        assert b.data == "b"
+        # 失败后也按更新间隔等待下一次波次，不会立即重试
+        assert self.timers[-1] == pytest.approx(600 - WAVE_LEAD.total_seconds(), abs=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.qweather.weather import QWeatherEntity
+
+
+def daily(day: str, temp_max: str) -> dict[str, str]:
+    return {"fxDate": day, "tempMax": temp_max, "tempMin": "5", "iconDay": "100", "iconNight": "150"}
+
+
+def coordinators() -> SimpleNamespace:
+    return SimpleNamespace(
+        client=SimpleNamespace(latitude="39.92", longitude="116.41"),
+        observation=SimpleNamespace(data=None),
+        daily_forecast=SimpleNamespace(data=[daily("2026-10-19", "20")]),
+        hourly_forecast=SimpleNamespace(data=None),
+        air_now=SimpleNamespace(data=None),
+    )
+
+
+class TwiceDailyForecastTests(unittest.TestCase):
+    def setUp(self):
+        self.coordinators = coordinators()
+        self.entity = QWeatherEntity(self.coordinators, "Home", "home")
+        patcher = patch.object(self.entity, "_async_write_ha_state_soon")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_twice_daily_update_without_daily_subscriber(self):
+        self.coordinators.daily_forecast.data = [daily("2026-10-19", "25")]
+        self.entity._handle_twice_daily_forecast_coordinator_update()  # noqa: SLF001
+        assert self.entity._async_forecast_twice_daily()[0]["native_temperature"] == 25  # noqa: SLF001
+        assert self.coordinators.daily_forecast.data is None
+
+    def test_both_handlers_for_one_update(self):
+        self.coordinators.daily_forecast.data = [daily("2026-10-19", "25")]
+        self.entity._handle_daily_forecast_coordinator_update()  # noqa: SLF001
+        self.entity._handle_twice_daily_forecast_coordinator_update()  # noqa: SLF001
+        assert self.entity._async_forecast_daily()[0]["native_temperature"] == 25  # noqa: SLF001
+        assert self.entity._async_forecast_twice_daily()[0]["native_temperature"] == 25  # noqa: SLF001
+
+
+if __name__ == "__main__":
+    unittest.main()